@@ -2,11 +2,14 @@
 """
 Ops Agent Executor using proper A2A SDK
 """
+import asyncio
 import logging
-from typing import Optional
+import os
+import uuid
+from typing import List, Optional
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
+from a2a.server.events import Event, EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
     InternalError,
@@ -22,13 +25,73 @@ from a2a.utils.errors import ServerError
 
 # Import your existing graph
 from .graph import app as ops_graph
+from .a2a_messages import agent_text_template, stamp_message
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent graph runs so Neo4j/LLM connection pools aren't starved
+MAX_CONCURRENT_GRAPH_RUNS = int(os.getenv("OPS_MAX_CONCURRENT_GRAPH_RUNS", "8"))
+# Subgraph depth whose node updates are reported as progress: 0 is the
+# top-level domain node, 1 the stages inside a domain subgraph
+PROGRESS_DEPTH = 1
+# Length of the per-node preview pushed to the client as a status update
+STATUS_PREVIEW_CHARS = 200
+# Nodes whose LLM output is the final answer, streamed to the client token by token
+STREAMED_ANSWER_NODES = frozenset({"synthesis"})
+# Fixed status text, validated once and stamped per task
+_WORKING_MESSAGE = agent_text_template("Processing infrastructure request...")
+
+def _last_response_content(messages) -> Optional[str]:
+    """Return the content of the latest assistant message in a node update"""
+    last = None
+    # Walk forward checking the cheap BaseMessage.type attribute first;
+    # plain dict messages are only inspected when that misses
+    for msg in messages:
+        if getattr(msg, "type", None) == "ai":
+            last = msg.content
+        elif isinstance(msg, dict) and msg.get("role") == "assistant":
+            last = msg.get("content")
+    return last
+
+class _BufferedEventQueue:
+    """Collects events so they reach the real queue in one drain"""
+
+    def __init__(self, event_queue: EventQueue):
+        self._event_queue = event_queue
+        self._pending: List[Event] = []
+
+    async def enqueue_event(self, event: Event) -> None:
+        self._pending.append(event)
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        for event in pending:
+            await self._event_queue.enqueue_event(event)
+
+class BufferedTaskUpdater(TaskUpdater):
+    """TaskUpdater that holds status/artifact events until flush()
+
+    Call flush() at graph-step boundaries; terminal status updates
+    (complete/failed/...) flush automatically.
+    """
+
+    def __init__(self, event_queue: EventQueue, task_id: str, context_id: str):
+        self._buffer = _BufferedEventQueue(event_queue)
+        super().__init__(self._buffer, task_id, context_id)
+
+    async def update_status(self, state: TaskState, message=None, final: bool = False, timestamp=None) -> None:
+        await super().update_status(state, message, final=final, timestamp=timestamp)
+        if final or state in self._terminal_states:
+            await self.flush()
+
+    async def flush(self) -> None:
+        await self._buffer.flush()
+
 class OpsAgentExecutor(AgentExecutor):
     """Ops Agent Executor for infrastructure operations"""
 
+    _graph_semaphore = asyncio.Semaphore(MAX_CONCURRENT_GRAPH_RUNS)
+
     def __init__(self):
         logger.info("Initializing OpsAgentExecutor...")
 
@@ -37,12 +100,8 @@ class OpsAgentExecutor(AgentExecutor):
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
-        error = self._validate_request(context)
-        if error:
-            raise ServerError(error=InvalidParamsError())
-
         query = context.get_user_input()
-        logger.info(f"Processing ops query: {query}")
+        logger.info("Processing ops query: %s", query)
         
         task = context.current_task
         if not task:
@@ -52,48 +111,84 @@ class OpsAgentExecutor(AgentExecutor):
             else:
                 raise ServerError(error=InvalidParamsError())
         
-        updater = TaskUpdater(event_queue, task.id, task.contextId)
+        updater = BufferedTaskUpdater(event_queue, task.id, task.contextId)
         
         try:
             await updater.update_status(
                 TaskState.working,
-                new_agent_text_message(
-                    "Processing infrastructure request...",
-                    task.contextId,
-                    task.id,
-                ),
+                stamp_message(_WORKING_MESSAGE, task.contextId, task.id),
             )
+            await updater.flush()
             
-            # Use your existing LangGraph system
-            initial_state = {"messages": [{"role": "user", "content": query}]}
-            result = ops_graph.invoke(initial_state)
-            
-            # Extract response from your graph result
-            final_messages = result.get("messages", [])
+            # Use your existing LangGraph system without blocking the event loop
+            # The A2A domain forwards under this task's context id
+            initial_state = {
+                "messages": [{"role": "user", "content": query}],
+                "a2a_context_id": task.contextId,
+            }
             response_content = "Analysis completed"
+            artifact_id = str(uuid.uuid4())
+            streamed = False
             
-            for msg in reversed(final_messages):
-                if isinstance(msg, dict) and msg.get("role") == "assistant":
-                    response_content = msg.get("content", response_content)
-                    break
-                elif hasattr(msg, 'content'):
-                    response_content = msg.content
-                    break
+            # Stream node updates so the client sees progress per stage and
+            # only the latest message is kept instead of the full history.
+            # Answer tokens go out as appended artifact chunks as they arrive.
+            async with self._graph_semaphore:
+                async for namespace, mode, chunk in ops_graph.astream(
+                    initial_state, stream_mode=["updates", "messages"], subgraphs=True
+                ):
+                    if mode == "messages":
+                        token, metadata = chunk
+                        if metadata.get("langgraph_node") in STREAMED_ANSWER_NODES and token.content:
+                            await updater.add_artifact(
+                                [Part(root=TextPart(text=str(token.content)))],
+                                artifact_id=artifact_id,
+                                name='ops_analysis_result',
+                                append=streamed,
+                                last_chunk=False,
+                            )
+                            await updater.flush()
+                            streamed = True
+                        continue
+                    if len(namespace) > PROGRESS_DEPTH:
+                        # Nodes inside the domain agents (model/tool steps)
+                        # are too fine-grained to report
+                        continue
+                    for node, update in chunk.items():
+                        if not isinstance(update, dict):
+                            continue
+                        content = _last_response_content(update.get("messages", []))
+                        if not content:
+                            continue
+                        if not namespace:
+                            # The domain node's update carries its final answer
+                            response_content = content
+                        await updater.update_status(
+                            TaskState.working,
+                            new_agent_text_message(
+                                f"[{node}] {str(content)[:STATUS_PREVIEW_CHARS]}",
+                                task.contextId,
+                                task.id,
+                            ),
+                        )
+                    # One drain per graph step rather than one per event
+                    await updater.flush()
             
-            # Complete the task with response
+            # Complete the task with response; with append unset this replaces
+            # any streamed chunks, so the stored task holds one text part
             await updater.add_artifact(
                 [Part(root=TextPart(text=response_content))],
+                artifact_id=artifact_id,
                 name='ops_analysis_result',
+                last_chunk=True if streamed else None,
             )
             await updater.complete()
 
         except Exception as e:
-            logger.error(f'Error processing ops request: {e}')
+            await updater.flush()
+            logger.error('Error processing ops request: %s', e)
             raise ServerError(error=InternalError()) from e
 
-    def _validate_request(self, context: RequestContext) -> Optional[bool]:
-        return None
-
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+A2A Starlette application with pydantic-core JSON serialization
+"""
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from a2a.server.apps import A2AStarletteApplication
+from a2a.types import JSONRPCErrorResponse
+
+class FastJSONStarletteApplication(A2AStarletteApplication):
+    """A2AStarletteApplication that skips the stdlib json round trip.
+
+    The stock app dumps each pydantic response to a dict and hands it to
+    JSONResponse, which re-encodes it with json.dumps. Here responses are
+    encoded once by pydantic-core's model_dump_json, and the public agent
+    card is encoded once at startup and served as cached bytes.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._agent_card_body = self.agent_card.model_dump_json(
+            exclude_none=True,
+            by_alias=True,
+        ).encode()
+
+    def _create_response(self, handler_result: Any) -> Response:
+        """Encode JSON-RPC results directly; streams use the SDK's SSE path."""
+        if isinstance(handler_result, JSONRPCErrorResponse):
+            body = handler_result.model_dump_json(exclude_none=True)
+        elif hasattr(handler_result, "root"):
+            body = handler_result.root.model_dump_json(exclude_none=True)
+        else:
+            return super()._create_response(handler_result)
+        return Response(body, media_type="application/json")
+
+    async def _handle_get_agent_card(self, request: Request) -> Response:
+        """Serve the pre-encoded public agent card."""
+        return Response(self._agent_card_body, media_type="application/json")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+A2A client with pydantic-core JSON serialization on the forwarding path
+"""
+from collections.abc import AsyncGenerator
+from typing import Any
+from uuid import uuid4
+
+import httpx
+from httpx_sse import SSEError, aconnect_sse
+from pydantic import ValidationError
+
+from a2a.client import A2AClient
+from a2a.client.errors import A2AClientHTTPError, A2AClientJSONError, A2AClientTimeoutError
+from a2a.types import (
+    SendMessageRequest, SendMessageResponse,
+    SendStreamingMessageRequest, SendStreamingMessageResponse,
+)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+class FastJSONA2AClient(A2AClient):
+    """A2AClient that encodes and decodes message calls with pydantic-core.
+
+    The stock client dumps the request model to a dict for httpx's stdlib
+    json encoder, then json-decodes the reply into a dict before validating
+    it. Here the request is written straight to bytes with model_dump_json
+    and replies are parsed and validated in one model_validate_json pass.
+    Clients with interceptors fall back to the SDK implementation, since
+    interceptors operate on the dict payload.
+    """
+
+    async def send_message(
+        self,
+        request: SendMessageRequest,
+        *,
+        http_kwargs: dict[str, Any] | None = None,
+        context: Any = None,
+    ) -> SendMessageResponse:
+        if self.interceptors:
+            return await super().send_message(request, http_kwargs=http_kwargs, context=context)
+        if not request.id:
+            request.id = str(uuid4())
+        try:
+            response = await self.httpx_client.post(
+                self.url,
+                content=request.model_dump_json(exclude_none=True),
+                headers=_JSON_HEADERS,
+                **(http_kwargs or {}),
+            )
+            response.raise_for_status()
+            return SendMessageResponse.model_validate_json(response.content)
+        except httpx.ReadTimeout as e:
+            raise A2AClientTimeoutError("Client Request timed out") from e
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except ValidationError as e:
+            raise A2AClientJSONError(str(e)) from e
+        except httpx.RequestError as e:
+            raise A2AClientHTTPError(503, f"Network communication error: {e}") from e
+
+    async def send_message_streaming(
+        self,
+        request: SendStreamingMessageRequest,
+        *,
+        http_kwargs: dict[str, Any] | None = None,
+        context: Any = None,
+    ) -> AsyncGenerator[SendStreamingMessageResponse]:
+        if self.interceptors:
+            async for event in super().send_message_streaming(
+                request, http_kwargs=http_kwargs, context=context
+            ):
+                yield event
+            return
+        if not request.id:
+            request.id = str(uuid4())
+        kwargs = {"timeout": None, **(http_kwargs or {})}
+        async with aconnect_sse(
+            self.httpx_client,
+            "POST",
+            self.url,
+            content=request.model_dump_json(exclude_none=True),
+            # aconnect_sse adds the SSE headers to this dict in place
+            headers=dict(_JSON_HEADERS),
+            **kwargs,
+        ) as event_source:
+            try:
+                async for sse in event_source.aiter_sse():
+                    yield SendStreamingMessageResponse.model_validate_json(sse.data)
+            except SSEError as e:
+                raise A2AClientHTTPError(400, f"Invalid SSE response or protocol error: {e}") from e
+            except ValidationError as e:
+                raise A2AClientJSONError(str(e)) from e
+            except httpx.RequestError as e:
+                raise A2AClientHTTPError(503, f"Network communication error: {e}") from e
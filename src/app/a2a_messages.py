@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Prebuilt A2A agent messages for fixed status texts
+"""
+import uuid
+
+from a2a.types import Message, Part, Role, TextPart
+
+def agent_text_template(text: str) -> Message:
+    """Build a validated agent message for text, to be stamped per task."""
+    return Message(
+        role=Role.agent,
+        parts=[Part(root=TextPart(text=text))],
+        message_id="",
+    )
+
+def stamp_message(template: Message, context_id: str, task_id: str) -> Message:
+    """Copy a template for one task, equivalent to new_agent_text_message.
+
+    model_copy skips validation and reuses the template's parts, so constant
+    status updates don't rebuild and re-validate the same Message each time.
+    Every copy still gets its own message_id.
+    """
+    return template.model_copy(update={
+        "message_id": str(uuid.uuid4()),
+        "context_id": context_id,
+        "task_id": task_id,
+    })
@@ -2,59 +2,64 @@
 """
 Ops A2A Server using proper A2A SDK
 """
+import functools
 import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 import httpx
-from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCard, AgentSkill, AgentCapabilities
 
 from .a2a_agent_executor import OpsAgentExecutor
+from .a2a_app import FastJSONStarletteApplication
+from .a2a_task_store import ShardedInMemoryTaskStore
+from .graphs.a2a_orchestrator_subgraph import aclose_a2a_http_client
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Skills advertised by the ops agent card, built once at import
+_OPS_SKILLS = [
+    AgentSkill(
+        id="infrastructure_analysis",
+        name="Infrastructure Analysis", 
+        description="Neo4j infrastructure queries and system analysis",
+        tags=["infrastructure", "servers", "systems", "neo4j", "database"]
+    ),
+    AgentSkill(
+        id="security_analysis",
+        name="Security Analysis",
+        description="Security vulnerability assessment",
+        tags=["security", "vulnerabilities", "compliance"]
+    ),
+    AgentSkill(
+        id="rca_investigation", 
+        name="Root Cause Analysis",
+        description="Incident investigation and troubleshooting",
+        tags=["rca", "incidents", "troubleshooting", "analysis"]
+    ),
+    AgentSkill(
+        id="performance_monitoring",
+        name="Performance Monitoring", 
+        description="System performance analysis and monitoring",
+        tags=["performance", "monitoring", "metrics"]
+    )
+]
+
+@functools.lru_cache(maxsize=8)
 def create_ops_agent_card(host: str = "localhost", port: int = 8001) -> AgentCard:
     """Create agent card for ops system"""
-    skills = [
-        AgentSkill(
-            id="infrastructure_analysis",
-            name="Infrastructure Analysis", 
-            description="Neo4j infrastructure queries and system analysis",
-            tags=["infrastructure", "servers", "systems", "neo4j", "database"]
-        ),
-        AgentSkill(
-            id="security_analysis",
-            name="Security Analysis",
-            description="Security vulnerability assessment",
-            tags=["security", "vulnerabilities", "compliance"]
-        ),
-        AgentSkill(
-            id="rca_investigation", 
-            name="Root Cause Analysis",
-            description="Incident investigation and troubleshooting",
-            tags=["rca", "incidents", "troubleshooting", "analysis"]
-        ),
-        AgentSkill(
-            id="performance_monitoring",
-            name="Performance Monitoring", 
-            description="System performance analysis and monitoring",
-            tags=["performance", "monitoring", "metrics"]
-        )
-    ]
-    
     return AgentCard(
         name="Ops Infrastructure Agent",
         description="Enterprise infrastructure management and incident response using LangGraph",
         url=f"http://{host}:{port}/",
         version="1.0.0",
         capabilities=AgentCapabilities(
-            streaming=False,
+            streaming=True,
             pushNotifications=True,
             stateTransitionHistory=False
         ),
-        skills=skills,
+        skills=_OPS_SKILLS,
         defaultInputModes=["text"],
         defaultOutputModes=["text"]
     )
@@ -63,19 +68,28 @@ def create_ops_server(host: str = "localhost", port: int = 8001):
     """Create ops A2A server"""
     agent_card = create_ops_agent_card(host, port)
     
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # The supervisor's A2A orchestrator subgraph runs in this process and
+        # keeps its pooled client open between requests
+        await aclose_a2a_http_client()
+    
     # Create A2A server components - simplified to match actual API
     request_handler = DefaultRequestHandler(
         agent_executor=OpsAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=ShardedInMemoryTaskStore(),
     )
     
-    server = A2AStarletteApplication(
+    server = FastJSONStarletteApplication(
         agent_card=agent_card, 
         http_handler=request_handler
     )
     
-    return server.build()
+    return server.build(lifespan=lifespan)
 
 if __name__ == "__main__":
+    # Configure logging once, at the process entry point
+    logging.basicConfig(level=logging.INFO)
     app = create_ops_server()
-    uvicorn.run(app, host="localhost", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="localhost", port=8001, loop="uvloop", http="httptools")
\ No newline at end of file
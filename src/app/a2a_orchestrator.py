@@ -3,31 +3,154 @@
 Smart Orchestrator using proper A2A SDK
 """
 import asyncio
+import functools
+import json
 import logging
+import operator
+import os
+import stat
+import tempfile
+import time
 import uuid
-from typing import Dict, TypedDict, List, Any, Optional
+from collections import Counter, OrderedDict
+from contextlib import aclosing, asynccontextmanager, suppress
+from pathlib import Path
+from typing import Annotated, Dict, TypedDict, List, Any, Optional
 
 import httpx
 import uvicorn
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
+from langgraph.types import Send
 
-from a2a.client import A2AClient, A2ACardResolver
+from a2a.client import A2ACardResolver
 from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.apps import A2AStarletteApplication
 from a2a.server.events import EventQueue
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.server.tasks import TaskUpdater
 from a2a.types import (
     AgentCard, AgentSkill, AgentCapabilities,
-    InternalError, InvalidParamsError, Part, Task, TaskState, TextPart,
-    UnsupportedOperationError,
+    InternalError, InvalidParamsError, Message, MessageSendConfiguration,
+    MessageSendParams, Part, Role, SendMessageRequest, SendMessageSuccessResponse,
+    SendStreamingMessageRequest, SendStreamingMessageSuccessResponse,
+    Task, TaskArtifactUpdateEvent, TaskState, TextPart, UnsupportedOperationError,
 )
 from a2a.utils import new_agent_text_message, new_task
 from a2a.utils.errors import ServerError
 
-logging.basicConfig(level=logging.INFO)
+from app.a2a_app import FastJSONStarletteApplication
+from app.a2a_client import FastJSONA2AClient
+from app.a2a_messages import agent_text_template, stamp_message
+from app.a2a_task_store import ShardedInMemoryTaskStore
+from app.keyword_matcher import KeywordMatcher
+from app.state import extract_user_query
+
 logger = logging.getLogger(__name__)
 
+# Keyword fallbacks used when no registered skill tag matches the request
+OPS_FALLBACK_KEYWORDS = frozenset({"server", "infrastructure", "database", "rca", "incident", "troubleshoot"})
+WEB_FALLBACK_KEYWORDS = frozenset({"search", "news", "current", "latest", "kubernetes", "web", "internet"})
+# Narrower web keyword set used when the routing workflow itself fails
+WEB_ERROR_FALLBACK_KEYWORDS = frozenset({"news", "latest", "current", "search", "kubernetes"})
+
+# All fallback keywords in one matcher: a single pass over the request
+# yields the hits, then each keyword class is a frozenset intersection.
+# Substring semantics are kept so "servers" still matches "server".
+_FALLBACK_MATCHER = KeywordMatcher(OPS_FALLBACK_KEYWORDS | WEB_FALLBACK_KEYWORDS)
+
+# Shared pool for orchestrator->agent calls. Connect and pool waits fail fast;
+# discovery keeps a short overall timeout, agent calls allow a 60s read.
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=30.0)
+DISCOVERY_TIMEOUT = httpx.Timeout(5.0, connect=1.0, pool=1.0)
+AGENT_CALL_TIMEOUT = httpx.Timeout(connect=1.0, read=60.0, write=5.0, pool=1.0)
+# Used when the Web Search Agent is selected by keyword fallback before its card is known
+WEB_SEARCH_AGENT_URL = "http://localhost:8002"
+# Resolved agent cards are cached on disk per endpoint so restarts within the
+# TTL skip the discovery round trip. The default lives in the per-user cache
+# dir, since cached cards decide where agent traffic is sent
+CARD_CACHE_PATH = Path(
+    os.getenv("XAIOPS_CARD_CACHE")
+    or Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "xaiops" / "agent_cards.json"
+)
+CARD_CACHE_TTL = 300.0
+# A cached agent that fails its background re-probe is retried with backoff
+CARD_REPROBE_INITIAL_DELAY = 5.0
+CARD_REPROBE_MAX_DELAY = 60.0
+# Longest query accepted; anything larger is rejected before a task is created
+MAX_QUERY_LEN = int(os.getenv("XAIOPS_MAX_QUERY_LEN", "4096"))
+# Length of the forwarded web search preview pushed as a status update
+STATUS_PREVIEW_CHARS = 200
+
+# Run routing through the compiled LangGraph workflow instead of the direct
+# coroutine path; both produce the same state
+USE_LANGGRAPH = os.getenv("XAIOPS_USE_LANGGRAPH") == "1"
+
+# Routing results are a pure function of the lowercased request and the
+# registered agents, so repeats within the TTL are served from an LRU cache
+ROUTE_CACHE_SIZE = 1024
+ROUTE_CACHE_TTL = 60.0
+
+# Fixed status texts, validated once and stamped per task
+_ROUTING_MESSAGE = agent_text_template("Routing request to best agent...")
+_FORWARDING_MESSAGE = agent_text_template("Forwarding to Web Search Agent for web search...")
+
+def _load_card_cache(path: Path) -> Dict[str, dict]:
+    """Read the endpoint -> {"fetched_at", "card"} cache, empty if missing or corrupt
+    
+    A file that isn't a regular file owned by this user, or that other users
+    can write, is ignored, so nobody else can plant cards that redirect agents.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    except OSError:
+        return {}
+    try:
+        with os.fdopen(fd) as f:
+            info = os.fstat(f.fileno())
+            if (
+                not stat.S_ISREG(info.st_mode)
+                or info.st_uid != os.getuid()
+                or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+            ):
+                logger.warning("Ignoring agent card cache %s: not private to this user", path)
+                return {}
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_card_cache(path: Path, cache: Dict[str, dict]):
+    """Write the card cache atomically, readable only by this user"""
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # mkstemp creates the file 0600 under a random name
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning("Could not write agent card cache %s: %s", path, e)
+
+def _card_serves_endpoint(agent_card: AgentCard, endpoint: str) -> bool:
+    """Whether a card's advertised URL is the endpoint it was cached for"""
+    return agent_card.url.rstrip("/") == endpoint.rstrip("/")
+
+def _first_text(artifacts) -> Optional[str]:
+    """Return the text of the first TextPart across artifacts, or None"""
+    return next(
+        (
+            part.root.text
+            for artifact in artifacts
+            for part in artifact.parts
+            if isinstance(part.root, TextPart)
+        ),
+        None,
+    )
+
 class RouterState(TypedDict, total=False):
     """State for the orchestrator workflow"""
     request: Optional[str]
@@ -41,75 +164,300 @@ class RouterState(TypedDict, total=False):
     agent_url: Optional[str]
     agent_skills: Optional[List[str]]
     analysis_details: Optional[str]
+    # Agents sharing the top skill score; each gets its own route branch
+    candidate_agents: Optional[List[str]]
+    # Per-branch route results, concatenated by the reducer and merged in join
+    routes: Annotated[List[dict], operator.add]
+
+async def _analyze_node(state: RouterState, config: RunnableConfig):
+    """Workflow node delegating to the orchestrator passed in the run config"""
+    return await config["configurable"]["orchestrator"]._analyze_request(state)
+
+async def _route_node(state: RouterState, config: RunnableConfig):
+    """Workflow node routing one fan-out branch to its selected agent"""
+    result = await config["configurable"]["orchestrator"]._route_to_agent(state)
+    return {"routes": [{"selected_agent": state["selected_agent"], **result}]}
+
+def _fan_out_routes(state: RouterState) -> List[Send]:
+    """Send one route branch per top-scoring agent so tied agents run in parallel"""
+    candidates = state.get("candidate_agents") or [state["selected_agent"]]
+    return [Send("route", {**state, "selected_agent": name}) for name in candidates]
+
+def _join_routes(state: RouterState) -> RouterState:
+    """Merge the route branches; the first candidate stays the selected agent"""
+    order = state.get("candidate_agents") or [state["selected_agent"]]
+    routes = sorted(state["routes"], key=lambda route: order.index(route["selected_agent"]))
+    primary = routes[0]
+    
+    merged: RouterState = {
+        "selected_agent": primary["selected_agent"],
+        "response": "\n\n".join(route["response"] for route in routes),
+        "success": any(route["success"] for route in routes),
+    }
+    if "agent_url" in primary:
+        merged["agent_url"] = primary["agent_url"]
+        merged["agent_skills"] = primary["agent_skills"]
+    return merged
 
 class SmartOrchestrator:
     """Intelligent orchestrator using proper A2A SDK"""
     
+    # Long-lived and read on every request, so skip the per-instance __dict__
+    __slots__ = ("agents", "_initialized", "_init_lock", "_http", "_a2a_clients", "_tag_index", "_tag_matcher",
+                 "_agent_skill_names", "_route_cache", "_card_revalidation")
+    
+    # Compiled once and shared by all instances; nodes find their
+    # orchestrator through config["configurable"]["orchestrator"]
+    _compiled_workflow = None
+    
     def __init__(self):
         self.agents: Dict[str, AgentCard] = {}
-        self.workflow = self._create_workflow()
         self._initialized = False
+        # Serializes cold-start discovery so concurrent first requests probe once
+        self._init_lock = asyncio.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
+        # One A2AClient per registered agent, all sharing the pooled HTTP client
+        self._a2a_clients: Dict[str, FastJSONA2AClient] = {}
+        # Inverted tag_lower -> [(agent_name, skill_name)] index rebuilt on registration
+        self._tag_index: Dict[str, List[tuple]] = {}
+        self._tag_matcher = KeywordMatcher([])
+        # agent_name -> skill names, reported by _route_to_agent
+        self._agent_skill_names: Dict[str, List[str]] = {}
+        # request_lower -> (expires_at, result), oldest first; cleared on registration
+        self._route_cache: OrderedDict = OrderedDict()
+        # Background re-probe of agents registered from the disk card cache
+        self._card_revalidation: Optional[asyncio.Task] = None
+    
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled HTTP client shared by all agent calls"""
+        if self._http is None:
+            # Plain HTTP/1.1: the agents are http:// endpoints, and httpx only
+            # negotiates HTTP/2 through TLS ALPN
+            self._http = httpx.AsyncClient(
+                timeout=DISCOVERY_TIMEOUT,
+                limits=HTTP_LIMITS,
+            )
+        return self._http
+    
+    def get_a2a_client(self, agent_name: str, fallback_url: str) -> FastJSONA2AClient:
+        """Get the cached A2AClient for an agent, or a one-off client for fallback_url"""
+        client = self._a2a_clients.get(agent_name)
+        if client is None:
+            agent_card = self.agents.get(agent_name)
+            if agent_card is None:
+                # Not discovered yet; don't cache so the card is used once it registers
+                return FastJSONA2AClient(self.get_http_client(), url=fallback_url)
+            client = FastJSONA2AClient(self.get_http_client(), agent_card=agent_card)
+            self._a2a_clients[agent_name] = client
+        return client
+    
+    async def startup(self):
+        """Open the pooled HTTP client before the first request arrives"""
+        self.get_http_client()
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._card_revalidation is not None:
+            # Wait for the re-probe to stop so it isn't left using the client below
+            self._card_revalidation.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._card_revalidation
+            self._card_revalidation = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._a2a_clients.clear()
     
     async def initialize_agents(self):
         """Initialize with default agent endpoints"""
         if self._initialized:
             return
-            
-        default_agents = [
-            "http://localhost:8001",  # Ops agent
-            "http://localhost:8002",  # LlamaStack agent
-        ]
         
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with self._init_lock:
+            # Another request may have finished discovery while we waited
+            if self._initialized:
+                return
+            
+            default_agents = [
+                "http://localhost:8001",  # Ops agent
+                "http://localhost:8002",  # LlamaStack agent
+            ]
+            
+            card_cache = await asyncio.to_thread(_load_card_cache, CARD_CACHE_PATH)
+            now = time.time()
+            results: Dict[str, Any] = {}
             for endpoint in default_agents:
-                try:
-                    resolver = A2ACardResolver(client, endpoint)
-                    agent_card = await resolver.get_agent_card()
-                    if agent_card:
-                        self.agents[agent_card.name] = agent_card
-                        logger.info(f"Registered {agent_card.name} from {endpoint}")
-                except Exception as e:
-                    logger.warning(f"Could not register {endpoint}: {e}")
+                entry = card_cache.get(endpoint)
+                if entry and now - entry.get("fetched_at", 0) < CARD_CACHE_TTL:
+                    try:
+                        agent_card = AgentCard.model_validate(entry["card"])
+                    except (KeyError, ValueError):
+                        continue
+                    if not _card_serves_endpoint(agent_card, endpoint):
+                        logger.warning("Ignoring cached card for %s: it points at %s", endpoint, agent_card.url)
+                        continue
+                    results[endpoint] = (agent_card.name, agent_card)
+                    logger.info("Loaded cached card %s for %s", agent_card.name, endpoint)
+            cached = [endpoint for endpoint in default_agents if endpoint in results]
+            
+            misses = [endpoint for endpoint in default_agents if endpoint not in results]
+            if misses:
+                client = self.get_http_client()
+                # Probe all endpoints concurrently - startup costs max RTT, not the sum
+                fetched = await asyncio.gather(
+                    *[self._resolve(client, endpoint) for endpoint in misses],
+                    return_exceptions=True,
+                )
+                results.update(zip(misses, fetched))
+            
+            cache_dirty = False
+            # Register in endpoint order so routing tie-breaks don't depend on the cache
+            for endpoint in default_agents:
+                result = results[endpoint]
+                if isinstance(result, BaseException):
+                    # _resolve logs ordinary failures; this catches anything it let through
+                    logger.warning("Discovery of %s failed: %r", endpoint, result)
+                elif result is not None:
+                    name, agent_card = result
+                    self.agents[name] = agent_card
+                    if endpoint in misses:
+                        card_cache[endpoint] = {
+                            "fetched_at": now,
+                            "card": agent_card.model_dump(mode="json", exclude_none=True, by_alias=True),
+                        }
+                        cache_dirty = True
+            if cache_dirty:
+                # mkstemp, write and rename block, so keep them off the event loop
+                await asyncio.to_thread(_save_card_cache, CARD_CACHE_PATH, card_cache)
+            
+            self._build_tag_index()
+            self._initialized = True
+            
+            if cached:
+                # Cached cards skip the probe at startup; re-probe them in the
+                # background so an agent that has gone down is dropped now
+                # rather than when its cache entry expires
+                self._card_revalidation = asyncio.create_task(
+                    self._revalidate_cached_cards(default_agents, cached, results, card_cache)
+                )
+    
+    async def _revalidate_cached_cards(self, endpoints, cached, registered, card_cache):
+        """Re-probe the agents registered from cache until every one has answered
         
-        self._initialized = True
+        An unreachable agent is taken out of routing at once but keeps its disk
+        cache entry, and is probed again with backoff until it answers.
+        """
+        client = self.get_http_client()
+        pending = cached
+        delay = CARD_REPROBE_INITIAL_DELAY
+        while True:
+            fetched = await asyncio.gather(
+                *[self._resolve(client, endpoint) for endpoint in pending],
+                return_exceptions=True,
+            )
+            now = time.time()
+            unreachable = []
+            for endpoint, result in zip(pending, fetched):
+                if isinstance(result, BaseException) or result is None:
+                    logger.warning("Cached agent at %s is unreachable; retrying in %.0fs", endpoint, delay)
+                    unreachable.append(endpoint)
+                    registered[endpoint] = None
+                    continue
+                registered[endpoint] = result
+                card_cache[endpoint] = {
+                    "fetched_at": now,
+                    "card": result[1].model_dump(mode="json", exclude_none=True, by_alias=True),
+                }
+            if len(unreachable) < len(pending):
+                await asyncio.to_thread(_save_card_cache, CARD_CACHE_PATH, card_cache)
+            self._reregister(endpoints, registered)
+            if not unreachable:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CARD_REPROBE_MAX_DELAY)
+            pending = unreachable
+    
+    def _reregister(self, endpoints, registered):
+        """Rebuild the registry in endpoint order from the resolved (name, card) results"""
+        agents: Dict[str, AgentCard] = {}
+        for endpoint in endpoints:
+            result = registered.get(endpoint)
+            if isinstance(result, tuple):
+                name, agent_card = result
+                agents[name] = agent_card
+        # Clients built from a replaced card may point at its old URL
+        for name, agent_card in self.agents.items():
+            if agents.get(name) is not agent_card:
+                self._a2a_clients.pop(name, None)
+        self.agents = agents
+        self._build_tag_index()
+    
+    def _build_tag_index(self):
+        """Invert registered skill tags so routing doesn't re-walk agent cards"""
+        tag_index: Dict[str, List[tuple]] = {}
+        self._agent_skill_names = {}
+        for agent_name, agent_card in self.agents.items():
+            self._agent_skill_names[agent_name] = [skill.name for skill in agent_card.skills]
+            for skill in agent_card.skills:
+                for tag in (skill.tags or []):
+                    tag_index.setdefault(tag.lower(), []).append((agent_name, skill.name))
+        self._tag_index = tag_index
+        self._tag_matcher = KeywordMatcher(tag_index)
+        # Cached routes were scored against the old registry
+        self._route_cache.clear()
+    
+    async def _resolve(self, client: httpx.AsyncClient, endpoint: str):
+        """Resolve a single agent card, returning (name, card) or None"""
+        try:
+            resolver = A2ACardResolver(client, endpoint)
+            agent_card = await resolver.get_agent_card()
+            if agent_card:
+                logger.info("Registered %s from %s", agent_card.name, endpoint)
+                return agent_card.name, agent_card
+        except Exception as e:
+            logger.warning("Could not register %s: %s", endpoint, e)
+        return None
     
-    def _create_workflow(self):
-        """Create LangGraph workflow for routing"""
-        workflow = StateGraph(RouterState)
-        workflow.add_node("analyze", self._analyze_request)
-        workflow.add_node("route", self._route_to_agent)
-        workflow.add_edge("analyze", "route")
-        workflow.set_entry_point("analyze")
-        workflow.set_finish_point("route")
-        return workflow.compile()
+    @property
+    def workflow(self):
+        """The shared compiled routing workflow, built the first time it is needed"""
+        return self._create_workflow()
     
-    async def _analyze_request(self, state):
+    @classmethod
+    def _create_workflow(cls):
+        """Create LangGraph workflow for routing (compiled on first use only)"""
+        if cls._compiled_workflow is None:
+            workflow = StateGraph(RouterState)
+            workflow.add_node("analyze", _analyze_node)
+            workflow.add_node("route", _route_node)
+            workflow.add_node("join", _join_routes)
+            workflow.add_conditional_edges("analyze", _fan_out_routes, ["route"])
+            workflow.add_edge("route", "join")
+            workflow.set_entry_point("analyze")
+            workflow.set_finish_point("join")
+            SmartOrchestrator._compiled_workflow = workflow.compile()
+        return cls._compiled_workflow
+    
+    async def _analyze_request(self, state: RouterState) -> RouterState:
         """Analyze request and select best agent using sophisticated skill matching"""
-        logger.info(f"_analyze_request called with state: {state}")
-        
-        # Ensure agents are initialized
-        await self.initialize_agents()
+        logger.info("_analyze_request called with state: %s", state)
         
         # Extract request from multiple possible state formats
         request = None
         if "request" in state:
             request = state["request"]
-            logger.info(f"Found request in state: {request}")
+            logger.info("Found request in state: %s", request)
         elif "query" in state:
             request = state["query"]
-            logger.info(f"Found query in state: {request}")
+            logger.info("Found query in state: %s", request)
         elif "messages" in state and len(state["messages"]) > 0:
             # Extract from LangGraph messages format
-            last_message = state["messages"][-1]
-            if isinstance(last_message, dict):
-                request = last_message.get("content", "")
-            else:
-                request = getattr(last_message, 'content', "")
-            logger.info(f"Extracted from messages: {request}")
+            request = extract_user_query(state)
+            logger.info("Extracted from messages: %s", request)
         else:
             # Fallback for unexpected state format
             request = str(state)
-            logger.warning(f"Unexpected state format, using string representation: {state}")
+            logger.warning("Unexpected state format, using string representation: %s", state)
         
         if not request:
             logger.error("No request content found in state")
@@ -120,36 +468,42 @@ class SmartOrchestrator:
         best_score = 0.0
         
         request_lower = request.lower()
-        logger.info(f"Analyzing request: '{request_lower}' against {len(self.agents)} agents")
+        logger.info("Analyzing request: '%s' against %s agents", request_lower, len(self.agents))
         
-        for agent_name, agent_card in self.agents.items():
-            score = 0
-            matched_skills = []
-            
-            for skill in agent_card.skills:
-                skill_score = 0
-                for tag in (skill.tags or []):
-                    if tag.lower() in request_lower:
-                        skill_score += 1
-                        matched_skills.append(tag)
-                        logger.info(f"Agent '{agent_name}' skill '{skill.name}' matched tag '{tag}'")
-                
-                score += skill_score
-            
-            if score > best_score:
-                best_score = score
-                best_agent = agent_name
-                logger.info(f"New best agent: {agent_name} (score: {score}, skills: {matched_skills})")
+        scores: Counter = Counter()
+        matched_skills: Dict[str, List[str]] = {}
+        # Tag scoring is substring containment, not numeric work, so keep it off
+        # Numba: nopython mode handles str.lower/`in` poorly. Scaling ladder:
+        #   1. up to ~100 tags: pure-Python `in` checks (KeywordMatcher fallback)
+        #   2. up to ~10k tags: pyahocorasick automaton, one C pass (routing extra)
+        #   3. only if scoring becomes embedding similarity: numpy matmul, with
+        #      @njit(parallel=True, cache=True) as an optional accelerator
+        matched_tags = self._tag_matcher.matches(request_lower)
+        # Only the matched tags are visited; each posting is one skill that carries the tag
+        for tag in matched_tags:
+            for agent_name, skill_name in self._tag_index[tag]:
+                scores[agent_name] += 1
+                matched_skills.setdefault(agent_name, []).append(tag)
+                logger.info("Agent '%s' skill '%s' matched tag '%s'", agent_name, skill_name, tag)
+        
+        candidate_agents: List[str] = []
+        if scores:
+            best_score = max(scores.values())
+            # Ties keep registration order, so best_agent is always first
+            candidate_agents = [name for name in self.agents if scores[name] == best_score]
+            best_agent = candidate_agents[0]
+            logger.info("New best agent: %s (score: %s, skills: %s)", best_agent, best_score, matched_skills[best_agent])
         
         # Enhanced default routing logic with better keyword detection
         if not best_agent or best_score == 0:
             logger.info("No skill matches found, using enhanced keyword routing")
             
-            if any(word in request_lower for word in ["server", "infrastructure", "database", "rca", "incident", "troubleshoot"]):
+            fallback_hits = _FALLBACK_MATCHER.matches(request_lower)
+            if not fallback_hits.isdisjoint(OPS_FALLBACK_KEYWORDS):
                 best_agent = "Ops Infrastructure Agent"
                 best_score = 0.7
                 logger.info("Keyword routing to Ops Infrastructure Agent")
-            elif any(word in request_lower for word in ["search", "news", "current", "latest", "kubernetes", "web", "internet"]):
+            elif not fallback_hits.isdisjoint(WEB_FALLBACK_KEYWORDS):
                 best_agent = "Web Search Agent"
                 best_score = 0.8
                 logger.info("Keyword routing to Web Search Agent")
@@ -157,96 +511,129 @@ class SmartOrchestrator:
                 best_agent = "Ops Infrastructure Agent"  # Default fallback
                 best_score = 0.5
                 logger.info("Default fallback to Ops Infrastructure Agent")
+            candidate_agents = [best_agent]
         
         confidence = min(best_score / 3.0, 1.0) if best_score > 0 else 0.5
         reasoning = f"Selected {best_agent} based on skill matching (score: {best_score}) and keyword analysis"
+        if len(candidate_agents) > 1:
+            reasoning += f"; tied with {', '.join(candidate_agents[1:])}, querying all in parallel"
         
         result_state = {
             "selected_agent": best_agent,
+            "candidate_agents": candidate_agents,
             "confidence": confidence,
             "reasoning": reasoning,
             "request": request,
             "analysis_details": f"Processed {len(self.agents)} agents, best score: {best_score}"
         }
         
-        # Update state while preserving existing keys
-        state.update(result_state)
-        
-        logger.info(f"_analyze_request completed: {result_state}")
-        return state
+        # Return only the changed keys; LangGraph merges them into the state
+        logger.info("_analyze_request completed: %s", result_state)
+        return result_state
     
-    async def _route_to_agent(self, state):
+    async def _route_to_agent(self, state: RouterState) -> RouterState:
         """Route request to selected agent with detailed information"""
         selected_agent = state["selected_agent"]
         request = state["request"]
         confidence = state.get("confidence", 0)
         reasoning = state.get("reasoning", "")
         
-        logger.info(f"_route_to_agent: Routing '{request}' to '{selected_agent}'")
+        logger.info("_route_to_agent: Routing '%s' to '%s'", request, selected_agent)
         
         agent_card = self.agents.get(selected_agent)
         if not agent_card:
             error_msg = f"Agent {selected_agent} not available"
             logger.error(error_msg)
-            state["response"] = error_msg
-            state["success"] = False
-            return state
+            return {"response": error_msg, "success": False}
         
         # Provide detailed routing information
-        agent_skills = [skill.name for skill in agent_card.skills]
-        
-        response = f"✅ Successfully routed to {selected_agent}\n"
-        response += f"🎯 Confidence: {confidence:.2f}\n"
-        response += f"🧠 Reasoning: {reasoning}\n"
-        response += f"🔗 Agent URL: {agent_card.url}\n"
-        response += f"🛠️ Available Skills: {', '.join(agent_skills)}\n"
-        response += f"📝 Analysis: {state.get('analysis_details', 'No additional details')}"
+        agent_skills = self._agent_skill_names[selected_agent]
         
-        state["response"] = response
-        state["success"] = True
-        state["agent_url"] = agent_card.url
-        state["agent_skills"] = agent_skills
+        response = "\n".join([
+            f"✅ Successfully routed to {selected_agent}",
+            f"🎯 Confidence: {confidence:.2f}",
+            f"🧠 Reasoning: {reasoning}",
+            f"🔗 Agent URL: {agent_card.url}",
+            f"🛠️ Available Skills: {', '.join(agent_skills)}",
+            f"📝 Analysis: {state.get('analysis_details', 'No additional details')}",
+        ])
         
-        logger.info(f"_route_to_agent completed successfully for {selected_agent}")
+        logger.info("_route_to_agent completed successfully for %s", selected_agent)
+        return {
+            "response": response,
+            "success": True,
+            "agent_url": agent_card.url,
+            "agent_skills": agent_skills,
+        }
+    
+    async def _fast_path(self, state: RouterState) -> RouterState:
+        """Run analyze -> route fan-out -> join directly, without LangGraph bookkeeping"""
+        state = {**state, **await self._analyze_request(state)}
+        candidates = state["candidate_agents"]
+        results = await asyncio.gather(
+            *[self._route_to_agent({**state, "selected_agent": name}) for name in candidates]
+        )
+        state["routes"] = [
+            {"selected_agent": name, **result} for name, result in zip(candidates, results)
+        ]
+        state.update(_join_routes(state))
         return state
     
     async def process_request(self, request: str) -> Dict:
-        """Process request through proper LangGraph workflow"""
+        """Process request through the routing workflow (LangGraph when XAIOPS_USE_LANGGRAPH=1)"""
         # Ensure agents are initialized first
         await self.initialize_agents()
         
-        logger.info(f"Processing request through LangGraph workflow: {request}")
+        cache_key = request.lower()
+        cached = self._route_cache.get(cache_key)
+        if cached is not None:
+            expires_at, result = cached
+            if expires_at > time.monotonic():
+                self._route_cache.move_to_end(cache_key)
+                logger.info("Serving cached route for: %s", request)
+                return dict(result)
+            del self._route_cache[cache_key]
+        
+        routing_path = "LangGraph workflow" if USE_LANGGRAPH else "fast path"
+        logger.info("Processing request through %s: %s", routing_path, request)
         
         try:
-            # Properly format initial state for RouterState TypedDict
-            initial_state: RouterState = {
-                "request": request,
-                "query": request,
-                "messages": [{"role": "user", "content": request}]
-            }
+            # _analyze_request reads "request" first, so the query/messages
+            # aliases would only be copied through every node unused
+            initial_state: RouterState = {"request": request}
             
-            logger.info(f"Invoking workflow with state: {initial_state}")
+            logger.info("Invoking %s with state: %s", routing_path, initial_state)
             
-            # Invoke the LangGraph workflow
-            final_state = await self.workflow.ainvoke(initial_state)
+            if USE_LANGGRAPH:
+                final_state = await self.workflow.ainvoke(
+                    initial_state,
+                    config={"configurable": {"orchestrator": self}},
+                )
+            else:
+                final_state = await self._fast_path(initial_state)
             
-            logger.info(f"Workflow completed with state: {final_state}")
+            logger.info("%s completed with state: %s", routing_path.capitalize(), final_state)
             
-            return {
+            result = {
                 "success": True,
                 "selected_agent": final_state.get("selected_agent"),
                 "confidence": final_state.get("confidence", 0),
                 "reasoning": final_state.get("reasoning", ""),
                 "response": final_state.get("response", "No response")
             }
+            # Only workflow results are cached; error fallbacks are retried next time
+            self._route_cache[cache_key] = (time.monotonic() + ROUTE_CACHE_TTL, result)
+            if len(self._route_cache) > ROUTE_CACHE_SIZE:
+                self._route_cache.popitem(last=False)
+            return dict(result)
             
         except Exception as e:
-            logger.error(f"Workflow execution error: {e}")
+            logger.error("Workflow execution error: %s", e)
             
             # Fallback to simple routing if workflow fails
             request_lower = request.lower()
             
-            if any(word in request_lower for word in ["news", "latest", "current", "search", "kubernetes"]):
+            if not _FALLBACK_MATCHER.matches(request_lower).isdisjoint(WEB_ERROR_FALLBACK_KEYWORDS):
                 selected_agent = "Web Search Agent"
                 confidence = 0.6
                 reasoning = f"Fallback routing to Web Search Agent due to workflow error: {e}"
@@ -270,13 +657,20 @@ class OrchestratorAgentExecutor(AgentExecutor):
         self.orchestrator = SmartOrchestrator()
         # Don't initialize agents here, do it lazily during execution
 
+    def _validate_request(self, query: str) -> bool:
+        """Accept non-blank queries up to MAX_QUERY_LEN characters"""
+        return bool(query.strip()) and len(query) <= MAX_QUERY_LEN
+
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
         query = context.get_user_input()
-        logger.info(f"Orchestrator processing: {query}")
+        if not self._validate_request(query):
+            # Fail before allocating a task, updater or routing state
+            raise ServerError(error=InvalidParamsError())
+        logger.info("Orchestrator processing: %s", query)
         
         task = context.current_task
         if not task:
@@ -291,11 +685,7 @@ class OrchestratorAgentExecutor(AgentExecutor):
         try:
             await updater.update_status(
                 TaskState.working,
-                new_agent_text_message(
-                    "Routing request to best agent...",
-                    task.context_id,
-                    task.id,
-                ),
+                stamp_message(_ROUTING_MESSAGE, task.context_id, task.id),
             )
             
             result = await self.orchestrator.process_request(query)
@@ -304,68 +694,26 @@ class OrchestratorAgentExecutor(AgentExecutor):
                 # Actually call the Web Search Agent
                 await updater.update_status(
                     TaskState.working,
-                    new_agent_text_message(
-                        f"Forwarding to Web Search Agent for web search...",
-                        task.context_id,
-                        task.id,
-                    ),
+                    stamp_message(_FORWARDING_MESSAGE, task.context_id, task.id),
                 )
                 
                 try:
-                    # Call the Web Search Agent directly
-                    agent_url = "http://localhost:8002"
-                    payload = {
-                        "jsonrpc": "2.0",
-                        "id": str(uuid.uuid4()),
-                        "method": "message/send",
-                        "params": {
-                            "message": {
-                                "role": "user",
-                                "messageId": str(uuid.uuid4()),
-                                "contextId": str(uuid.uuid4()),
-                                "parts": [{"type": "text", "text": query}]
-                            },
-                            "configuration": {"acceptedOutputModes": ["text"]}
-                        }
-                    }
-                    
-                    async with httpx.AsyncClient(timeout=60.0) as client:
-                        response = await client.post(agent_url, json=payload)
-                        response.raise_for_status()
-                        agent_result = response.json()
-                        
-                        logger.info(f"Web Search Agent response: {agent_result}")
-                        
-                        # Extract the actual web search result
-                        if "result" in agent_result and "artifacts" in agent_result["result"]:
-                            artifacts = agent_result["result"]["artifacts"]
-                            for artifact in artifacts:
-                                parts = artifact.get("parts", [])
-                                for part in parts:
-                                    if part.get("kind") == "text":
-                                        web_search_result = part.get("text", "No search results")
-                                        break
-                                else:
-                                    continue
-                                break
-                            else:
-                                web_search_result = "No search results found"
-                        else:
-                            web_search_result = f"Agent response: {str(agent_result)[:500]}..."
-                        
-                        response_text = f"🔍 Web Search Results:\n\n{web_search_result}"
+                    web_search_result = await self._call_web_search_agent(query, updater, task)
+                    response_text = f"🔍 Web Search Results:\n\n{web_search_result}"
                 
                 except Exception as e:
-                    logger.error(f"Error calling Web Search Agent: {e}")
+                    logger.error("Error calling Web Search Agent: %s", e)
                     response_text = f"❌ Error contacting Web Search Agent: {str(e)}"
             else:
                 # For other agents or errors, show routing information
-                response_text = f"🎯 Agent Selection Results:\n"
-                response_text += f"Selected Agent: {result.get('selected_agent')}\n"
-                response_text += f"Confidence: {result.get('confidence'):.2f}\n"
-                response_text += f"Reasoning: {result.get('reasoning')}\n"
-                if not result.get("success", False):
-                    response_text += f"Error: {result.get('error', 'Unknown error')}"
+                error_line = "" if result.get("success", False) else f"Error: {result.get('error', 'Unknown error')}"
+                response_text = (
+                    f"🎯 Agent Selection Results:\n"
+                    f"Selected Agent: {result.get('selected_agent')}\n"
+                    f"Confidence: {result.get('confidence'):.2f}\n"
+                    f"Reasoning: {result.get('reasoning')}\n"
+                    f"{error_line}"
+                )
             
             await updater.add_artifact(
                 [Part(root=TextPart(text=response_text))],
@@ -374,45 +722,107 @@ class OrchestratorAgentExecutor(AgentExecutor):
             await updater.complete()
 
         except Exception as e:
-            logger.error(f'Orchestrator error: {e}')
+            logger.error('Orchestrator error: %s', e)
             raise ServerError(error=InternalError()) from e
 
-    def _validate_request(self, context: RequestContext) -> bool:
-        return False
+    async def _call_web_search_agent(self, query: str, updater: TaskUpdater, task: Task) -> str:
+        """Send query to the Web Search Agent and return the first text artifact"""
+        client = self.orchestrator.get_a2a_client("Web Search Agent", WEB_SEARCH_AGENT_URL)
+        # One id serves as both JSON-RPC id and message id, and the downstream
+        # task joins this task's context instead of a fresh random one
+        request_id = uuid.uuid4().hex
+        params = MessageSendParams(
+            message=Message(
+                role=Role.user,
+                message_id=request_id,
+                context_id=task.context_id,
+                parts=[Part(root=TextPart(text=query))],
+            ),
+            configuration=MessageSendConfiguration(accepted_output_modes=["text"]),
+        )
+        
+        agent_card = self.orchestrator.agents.get("Web Search Agent")
+        if agent_card is not None and agent_card.capabilities.streaming:
+            # Consume the SSE stream event by event, forwarding the result as
+            # soon as it arrives instead of waiting for the whole task body
+            web_search_result = None
+            request = SendStreamingMessageRequest(id=request_id, params=params)
+            # aclosing shuts the SSE stream and frees its pooled connection
+            # as soon as we return, including the early error return
+            stream = client.send_message_streaming(
+                request, http_kwargs={"timeout": AGENT_CALL_TIMEOUT}
+            )
+            async with aclosing(stream):
+                async for event in stream:
+                    agent_result = event.root
+                    if not isinstance(agent_result, SendStreamingMessageSuccessResponse):
+                        return f"Agent response: {str(agent_result)[:500]}..."
+                    update = agent_result.result
+                    if web_search_result is None and isinstance(update, TaskArtifactUpdateEvent):
+                        web_search_result = _first_text([update.artifact])
+                        if web_search_result is not None:
+                            await updater.update_status(
+                                TaskState.working,
+                                new_agent_text_message(
+                                    f"Web Search Agent: {web_search_result[:STATUS_PREVIEW_CHARS]}",
+                                    task.context_id,
+                                    task.id,
+                                ),
+                            )
+            return web_search_result or "No search results found"
+        
+        agent_response = await client.send_message(
+            SendMessageRequest(id=request_id, params=params),
+            http_kwargs={"timeout": AGENT_CALL_TIMEOUT},
+        )
+        
+        logger.info("Web Search Agent response: %s", agent_response)
+        
+        # Extract the actual web search result from the typed response
+        agent_result = agent_response.root
+        if (
+            isinstance(agent_result, SendMessageSuccessResponse)
+            and isinstance(agent_result.result, Task)
+            and agent_result.result.artifacts is not None
+        ):
+            return _first_text(agent_result.result.artifacts) or "No search results found"
+        return f"Agent response: {str(agent_result)[:500]}..."
 
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
         raise ServerError(error=UnsupportedOperationError())
 
+# Orchestrator skills are static, so build them once rather than per card
+_ORCHESTRATOR_SKILLS = [
+    AgentSkill(
+        id="request_routing",
+        name="Request Routing",
+        description="Intelligent request routing to specialized agents",
+        tags=["routing", "orchestration"]
+    ),
+    AgentSkill(
+        id="agent_coordination",
+        name="Agent Coordination",
+        description="Multi-agent system coordination",
+        tags=["coordination", "management"]
+    )
+]
+
+@functools.lru_cache(maxsize=8)
 def create_orchestrator_agent_card(host: str = "localhost", port: int = 8000) -> AgentCard:
     """Create orchestrator agent card"""
-    skills = [
-        AgentSkill(
-            id="request_routing",
-            name="Request Routing",
-            description="Intelligent request routing to specialized agents",
-            tags=["routing", "orchestration"]
-        ),
-        AgentSkill(
-            id="agent_coordination",
-            name="Agent Coordination",
-            description="Multi-agent system coordination",
-            tags=["coordination", "management"]
-        )
-    ]
-    
     return AgentCard(
         name="Smart Orchestrator Agent",
         description="Intelligent agent routing using LangGraph and A2A protocol",
         url=f"http://{host}:{port}/",
         version="1.0.0",
         capabilities=AgentCapabilities(
-            streaming=False,
+            streaming=True,
             pushNotifications=True,
             stateTransitionHistory=False
         ),
-        skills=skills,
+        skills=_ORCHESTRATOR_SKILLS,
         defaultInputModes=["text"],
         defaultOutputModes=["text"]
     )
@@ -421,18 +831,28 @@ def create_orchestrator_server(host: str = "localhost", port: int = 8000):
     """Create orchestrator A2A server"""
     agent_card = create_orchestrator_agent_card(host, port)
     
+    agent_executor = OrchestratorAgentExecutor()
+    
+    @asynccontextmanager
+    async def lifespan(app):
+        await agent_executor.orchestrator.startup()
+        yield
+        await agent_executor.orchestrator.aclose()
+    
     request_handler = DefaultRequestHandler(
-        agent_executor=OrchestratorAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        agent_executor=agent_executor,
+        task_store=ShardedInMemoryTaskStore(),
     )
     
-    server = A2AStarletteApplication(
+    server = FastJSONStarletteApplication(
         agent_card=agent_card, 
         http_handler=request_handler
     )
     
-    return server.build()
+    return server.build(lifespan=lifespan)
 
 if __name__ == "__main__":
+    # Configure logging once, at the process entry point
+    logging.basicConfig(level=logging.INFO)
     app = create_orchestrator_server()
-    uvicorn.run(app, host="localhost", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="localhost", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
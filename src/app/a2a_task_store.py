@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Sharded in-memory task store for the A2A servers
+"""
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+
+logger = logging.getLogger(__name__)
+
+class ShardedInMemoryTaskStore(TaskStore):
+    """In-memory TaskStore split into lock-striped shards.
+
+    InMemoryTaskStore keeps every task behind one asyncio.Lock, so all task
+    saves/reads across concurrent requests serialize on it. Here each task id
+    hashes to one of n_shards dicts with its own lock. Like InMemoryTaskStore,
+    state is per-process and lost on restart.
+    """
+
+    def __init__(self, n_shards: int = 16):
+        if n_shards < 1 or n_shards & (n_shards - 1):
+            raise ValueError(f"n_shards must be a power of two, got {n_shards}")
+        self._mask = n_shards - 1
+        self._shards: List[Tuple[Dict[str, Task], asyncio.Lock]] = [
+            ({}, asyncio.Lock()) for _ in range(n_shards)
+        ]
+
+    def _shard(self, task_id: str) -> Tuple[Dict[str, Task], asyncio.Lock]:
+        return self._shards[hash(task_id) & self._mask]
+
+    async def save(self, task: Task) -> None:
+        """Saves or updates a task in its shard."""
+        tasks, lock = self._shard(task.id)
+        async with lock:
+            tasks[task.id] = task
+
+    async def get(self, task_id: str) -> Task | None:
+        """Retrieves a task from its shard by ID."""
+        tasks, lock = self._shard(task_id)
+        async with lock:
+            return tasks.get(task_id)
+
+    async def delete(self, task_id: str) -> None:
+        """Deletes a task from its shard by ID."""
+        tasks, lock = self._shard(task_id)
+        async with lock:
+            if tasks.pop(task_id, None) is None:
+                logger.warning("Attempted to delete nonexistent task with id: %s", task_id)
@@ -1,153 +1,305 @@
-import sys
-import os
+import functools
+import itertools
+import logging
 import uuid
 import json
 import asyncio
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+import random
+import re
+from typing import Dict, Optional, Tuple
 
 import httpx
+from httpx_sse import EventSource
 from langgraph.graph import StateGraph, START, END, MessagesState
+from app.state import extract_user_query
 
-def extract_user_query(state):
-    """Helper function to safely extract user query from state"""
-    first_message = state["messages"][-1]
-    
-    if isinstance(first_message, dict):
-        content = first_message.get("content", "")
-    else:
-        content = getattr(first_message, 'content', "")
-    
-    if isinstance(content, list):
-        content = " ".join(str(item) for item in content)
-    elif not isinstance(content, str):
-        content = str(content)
+logger = logging.getLogger(__name__)
+
+A2A_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+A2A_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+# tasks/get backoff: first poll after 50ms, growing to at most every 2s
+POLL_INITIAL_DELAY = 0.05
+POLL_MAX_DELAY = 2.0
+POLL_BACKOFF = 1.7
+# A2A servers serialize Task.status last, so the last "state" key in a
+# tasks/get reply is the task state; its value is read without a full parse
+_TASK_STATE_RE = re.compile(rb'"state"\s*:\s*"([a-z-]+)"')
+_PENDING_STATES = frozenset({b"submitted", b"working"})
+# JSON-RPC ids only need to be unique per connection, so a counter will do
+_REQUEST_IDS = itertools.count(1)
+# Request bodies are fixed apart from a few values, so the skeletons are
+# encoded once and only the JSON-escaped values are spliced in per call
+_MESSAGE_REQUEST_TEMPLATE = (
+    b'{"jsonrpc":"2.0","id":%b,"method":%b,"params":{"message":{"role":"user",'
+    b'"messageId":%b,"contextId":%b,"parts":[{"type":"text","text":%b}]},'
+    b'"configuration":{"acceptedOutputModes":["text"]}}}'
+)
+_TASK_GET_TEMPLATE = b'{"jsonrpc":"2.0","id":%b,"method":"tasks/get","params":{"id":%b}}'
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_SSE_HEADERS = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+
+class A2AOrchestratorState(MessagesState):
+    # Reused as the A2A contextId so every turn joins the same conversation
+    a2a_context_id: str
+
+# Pooled client shared by every orchestrator call and task poll, so the
+# connection to the orchestrator stays open between requests
+_a2a_http: Optional[httpx.AsyncClient] = None
+_a2a_http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_a2a_http_client() -> httpx.AsyncClient:
+    """Get or create the pooled HTTP client for the running event loop"""
+    global _a2a_http, _a2a_http_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to the loop that opened them
+    if _a2a_http is None or _a2a_http_loop is not loop:
+        # One connect retry absorbs a refused connection while the
+        # orchestrator restarts, instead of failing the whole request.
+        # No http2: the orchestrator is plain http://, and httpx only
+        # negotiates HTTP/2 through TLS ALPN
+        transport = httpx.AsyncHTTPTransport(limits=A2A_LIMITS, retries=1)
+        _a2a_http = httpx.AsyncClient(timeout=A2A_TIMEOUT, transport=transport)
+        _a2a_http_loop = loop
+    return _a2a_http
+
+async def aclose_a2a_http_client():
+    """Close the pooled HTTP client, e.g. from a server shutdown hook"""
+    global _a2a_http, _a2a_http_loop
+    if _a2a_http is not None:
+        await _a2a_http.aclose()
+        _a2a_http = None
+        _a2a_http_loop = None
+
+# First-turn orchestrator calls in flight, keyed by (event loop, query text).
+# A first turn has no conversation state yet, so N clients asking the same
+# question (e.g. dashboards) share one A2A task. Later turns depend on their
+# conversation's history and are never coalesced. Entries are dropped as
+# soon as the call ends, so the registry never holds more than the
+# concurrent first turns and needs no size bound
+_inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+
+def _json_value(value):
+    return json.dumps(value).encode()
+
+def _request_id():
+    return _json_value(f"req-{next(_REQUEST_IDS)}")
+
+def message_request_body(method, message_id, context_id, text):
+    """Encode a message/send or message/stream request from the template"""
+    return _MESSAGE_REQUEST_TEMPLATE % (
+        _request_id(), _json_value(method), _json_value(message_id),
+        _json_value(context_id), _json_value(text),
+    )
+
+def finished_task_text(task_data):
+    """Return the response text of a completed or failed task, else None"""
+    task_state = task_data.get("status", {}).get("state")
     
-    return content
+    if task_state == "completed":
+        # Extract actual response text
+        artifacts = task_data.get("artifacts", [])
+        for artifact in artifacts:
+            parts = artifact.get("parts", [])
+            for part in parts:
+                if part.get("kind") == "text":
+                    return part.get("text", "No response text")
+        return "Task completed but no response found"
+    elif task_state == "failed":
+        error_msg = task_data.get("status", {}).get("message", "Task failed")
+        return f"External agent error: {error_msg}"
+    return None
 
-async def wait_for_task_completion(client, endpoint, task_id, max_wait=30):
-    """Wait for A2A task to complete and return result"""
-    for attempt in range(max_wait):
-        await asyncio.sleep(1)
+async def wait_for_task_completion(client, endpoint, task_id, max_wait=30.0):
+    """Wait up to max_wait seconds for A2A task to complete and return result"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    delay = POLL_INITIAL_DELAY
+    encoded_task_id = _json_value(task_id)
+    while loop.time() < deadline:
+        await asyncio.sleep(delay)
+        # Fast tasks finish near the first poll; slow ones are polled rarely
+        delay = min(delay * POLL_BACKOFF + random.uniform(0, POLL_INITIAL_DELAY), POLL_MAX_DELAY)
         
-        get_payload = {
-            "jsonrpc": "2.0",
-            "id": str(uuid.uuid4()),
-            "method": "tasks/get",
-            "params": {"id": task_id}
-        }
+        get_body = _TASK_GET_TEMPLATE % (_request_id(), encoded_task_id)
         
         try:
-            response = await client.post(endpoint, json=get_payload)
+            response = await client.post(endpoint, content=get_body, headers=_JSON_HEADERS)
             response.raise_for_status()
-            result = response.json()
+            raw = response.content
+            
+            # Still-running tasks are skipped without decoding history/artifacts
+            states = _TASK_STATE_RE.findall(raw)
+            if states and states[-1] in _PENDING_STATES:
+                continue
             
+            result = json.loads(raw)
             if "result" in result and result["result"]:
-                task_data = result["result"]
-                task_state = task_data.get("status", {}).get("state")
-                
-                if task_state == "completed":
-                    # Extract actual response text
-                    artifacts = task_data.get("artifacts", [])
-                    for artifact in artifacts:
-                        parts = artifact.get("parts", [])
-                        for part in parts:
-                            if part.get("kind") == "text":
-                                return part.get("text", "No response text")
-                    return "Task completed but no response found"
-                elif task_state == "failed":
-                    error_msg = task_data.get("status", {}).get("message", "Task failed")
-                    return f"External agent error: {error_msg}"
+                task_result = finished_task_text(result["result"])
+                if task_result is not None:
+                    return task_result
         except Exception as e:
-            print(f"DEBUG: Error checking task status: {e}")
+            logger.warning("Error checking task %s status: %s", task_id, e)
             continue
     
     return "External agent timeout - no response received"
 
+def _text_parts(parts):
+    return [part.get("text", "") for part in parts if part.get("kind") == "text"]
+
+async def stream_task_result(client, endpoint, body):
+    """Send a message/stream request and return the task's text result
+    
+    Returns None when the endpoint answers with plain JSON instead of an SSE
+    stream (streaming unsupported), so the caller can fall back to
+    message/send and polling.
+    """
+    artifacts = {}
+    async with client.stream(
+        "POST", endpoint, content=body, headers=_SSE_HEADERS
+    ) as response:
+        response.raise_for_status()
+        if not response.headers.get("content-type", "").startswith("text/event-stream"):
+            return None
+        
+        async for sse in EventSource(response).aiter_sse():
+            event = json.loads(sse.data)
+            if "error" in event:
+                return f"External agent error: {event['error'].get('message', 'Task failed')}"
+            
+            result = event.get("result") or {}
+            kind = result.get("kind")
+            if kind == "message":
+                return "\n".join(_text_parts(result.get("parts", []))) or "No response text"
+            if kind == "artifact-update":
+                artifact = result.get("artifact", {})
+                texts = _text_parts(artifact.get("parts", []))
+                if result.get("append"):
+                    artifacts.setdefault(artifact.get("artifactId"), []).extend(texts)
+                else:
+                    artifacts[artifact.get("artifactId")] = texts
+            elif kind == "status-update":
+                task_state = result.get("status", {}).get("state")
+                if task_state == "failed":
+                    error_msg = result.get("status", {}).get("message", "Task failed")
+                    return f"External agent error: {error_msg}"
+                if task_state == "completed" or result.get("final"):
+                    break
+    
+    # Completion is pushed by the server, so no tasks/get polling is needed
+    for texts in artifacts.values():
+        if texts:
+            return "".join(texts)
+    return "Task completed but no response found"
+
+@functools.lru_cache(maxsize=1)
 def create_a2a_orchestrator_subgraph():
     """Subgraph that routes queries to A2A orchestrator and waits for actual responses"""
     
     async def a2a_orchestrator_node(state):
         """Node that forwards query to A2A orchestrator and returns actual response"""
+        context_id = state.get("a2a_context_id")
         original_query = extract_user_query(state)
+        if context_id:
+            return await forward_query(original_query, context_id)
+        
+        # A caller that joins another's call keeps its own new contextId; the
+        # orchestrator first sees it on the caller's second turn
+        context_id = uuid.uuid4().hex
+        key = (asyncio.get_running_loop(), original_query)
+        call = _inflight.get(key)
+        if call is None:
+            call = asyncio.ensure_future(forward_query(original_query, context_id))
+            _inflight[key] = call
+            call.add_done_callback(lambda _: _inflight.pop(key, None))
+        else:
+            logger.debug("Joining in-flight A2A request for: %s", original_query)
         
-        print(f"DEBUG: A2A orchestrator processing: {original_query}")
+        # Shielded so one cancelled caller doesn't cancel the shared call
+        update = await asyncio.shield(call)
+        return {**update, "a2a_context_id": context_id}
+    
+    async def forward_query(original_query, context_id):
+        """Send one query to the A2A orchestrator under context_id"""
+        logger.debug("A2A orchestrator processing: %s", original_query)
         
         try:
             # Create A2A JSON-RPC request
-            payload = {
-                "jsonrpc": "2.0",
-                "id": str(uuid.uuid4()),
-                "method": "message/send",
-                "params": {
-                    "message": {
-                        "role": "user",
-                        "messageId": str(uuid.uuid4()),
-                        "contextId": str(uuid.uuid4()),
-                        "parts": [{"type": "text", "text": original_query}]
-                    },
-                    "configuration": {"acceptedOutputModes": ["text"]}
-                }
-            }
+            message_id = uuid.uuid4().hex
+            body = message_request_body("message/stream", message_id, context_id, original_query)
             
-            # Call A2A orchestrator and wait for actual response
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                print(f"DEBUG: Sending request to A2A orchestrator...")
-                response = await client.post(
-                    "http://localhost:8000",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                print(f"DEBUG: A2A orchestrator response: {result}")
-                
-                # Handle A2A protocol response
-                if "result" in result:
-                    a2a_result = result["result"]
-                    
-                    # If it's a task, wait for completion
-                    if isinstance(a2a_result, dict) and "id" in a2a_result:
-                        task_id = a2a_result["id"]
-                        print(f"DEBUG: Waiting for task {task_id} to complete...")
-                        
-                        actual_response = await wait_for_task_completion(
-                            client, "http://localhost:8000", task_id
-                        )
-                        
-                        return {
-                            "messages": [{
-                                "role": "assistant",
-                                "content": f"External Agent Response:\n\n{actual_response}",
-                                "name": "a2a_orchestrator"
-                            }]
-                        }
-                    
-                    # Handle direct response
-                    elif isinstance(a2a_result, dict) and "parts" in a2a_result:
-                        for part in a2a_result.get("parts", []):
-                            if part.get("type") == "text":
-                                response_text = part.get("text", "No response text")
-                                return {
-                                    "messages": [{
-                                        "role": "assistant",
-                                        "content": f"External Agent Response:\n\n{response_text}",
-                                        "name": "a2a_orchestrator"
-                                    }]
-                                }
-                
-                # Fallback if no clear response structure
+            # Call A2A orchestrator and wait for actual response, streamed
+            # when the server supports it
+            client = get_a2a_http_client()
+            logger.debug("Sending request to A2A orchestrator...")
+            streamed_response = await stream_task_result(client, "http://localhost:8000", body)
+            if streamed_response is not None:
                 return {
                     "messages": [{
                         "role": "assistant",
-                        "content": f"A2A Orchestrator Response:\n\nReceived response but couldn't extract content. Raw result: {str(result)[:500]}...",
+                        "content": f"External Agent Response:\n\n{streamed_response}",
                         "name": "a2a_orchestrator"
                     }]
                 }
+            
+            body = message_request_body("message/send", message_id, context_id, original_query)
+            response = await client.post(
+                "http://localhost:8000",
+                content=body,
+                headers=_JSON_HEADERS
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            logger.debug("A2A orchestrator response: %s", result)
+            
+            # Handle A2A protocol response
+            if "result" in result:
+                a2a_result = result["result"]
                 
+                # If it's a task, wait for completion unless the blocking
+                # message/send already returned it finished
+                if isinstance(a2a_result, dict) and "id" in a2a_result:
+                    task_id = a2a_result["id"]
+                    actual_response = finished_task_text(a2a_result)
+                    if actual_response is None:
+                        logger.debug("Waiting for task %s to complete...", task_id)
+                        actual_response = await wait_for_task_completion(
+                            client, "http://localhost:8000", task_id
+                        )
+                    
+                    return {
+                        "messages": [{
+                            "role": "assistant",
+                            "content": f"External Agent Response:\n\n{actual_response}",
+                            "name": "a2a_orchestrator"
+                        }]
+                    }
+                
+                # Handle direct response
+                elif isinstance(a2a_result, dict) and "parts" in a2a_result:
+                    for part in a2a_result.get("parts", []):
+                        if part.get("type") == "text":
+                            response_text = part.get("text", "No response text")
+                            return {
+                                "messages": [{
+                                    "role": "assistant",
+                                    "content": f"External Agent Response:\n\n{response_text}",
+                                    "name": "a2a_orchestrator"
+                                }]
+                            }
+            
+            # Fallback if no clear response structure
+            return {
+                "messages": [{
+                    "role": "assistant",
+                    "content": f"A2A Orchestrator Response:\n\nReceived response but couldn't extract content. Raw result: {str(result)[:500]}...",
+                    "name": "a2a_orchestrator"
+                }]
+            }
+            
         except httpx.HTTPError as e:
             error_msg = f"A2A orchestrator communication error: HTTP {e.response.status_code if hasattr(e, 'response') else 'unknown'}"
-            print(f"DEBUG: {error_msg}")
+            logger.warning("%s", error_msg)
             
             return {
                 "messages": [{
@@ -168,7 +320,7 @@ def create_a2a_orchestrator_subgraph():
             
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
-            print(f"DEBUG: A2A unexpected error: {error_msg}")
+            logger.error("A2A unexpected error: %s", error_msg)
             
             return {
                 "messages": [{
@@ -179,7 +331,7 @@ def create_a2a_orchestrator_subgraph():
             }
     
     # Build workflow
-    workflow = StateGraph(MessagesState)
+    workflow = StateGraph(A2AOrchestratorState)
     workflow.add_node("a2a_orchestrator", a2a_orchestrator_node)
     workflow.add_edge(START, "a2a_orchestrator")
     workflow.add_edge("a2a_orchestrator", END)
@@ -1,6 +1,11 @@
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+import functools
+import hashlib
+import operator
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated
 
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langchain_core.tools import tool
@@ -9,30 +14,138 @@ from app.llm_config import get_llm
 from app.tools.hitl_tools import security_approval_gate
 from app.tools.data_tools import neo4j_query_tool, vector_search_tool
 from app.prompts import load_prompt
+from app.state import message_content
 
-def extract_user_query(state):
-    """Helper function to safely extract user query from state."""
-    first_message = state["messages"][-1]
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire ttl seconds after insertion."""
     
-    if isinstance(first_message, dict):
-        content = first_message.get("content", "")
-    else:
-        content = getattr(first_message, 'content', "")
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
     
-    # Handle case where content might be a list
-    if isinstance(content, list):
-        content = " ".join(str(item) for item in content)
-    elif not isinstance(content, str):
-        content = str(content)
+    def get(self, key):
+        """Return the cached value for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
     
-    return content
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
 
+# Synthesis output for identical (query, findings) is reused for a while, since
+# dashboards and repeated inventory questions re-ask the same thing
+SYNTHESIS_CACHE_SIZE = 1024
+SYNTHESIS_CACHE_TTL = 300.0
+_synthesis_cache = _TTLCache(SYNTHESIS_CACHE_SIZE, SYNTHESIS_CACHE_TTL)
+SYNTHESIS_CACHE_STATS = _synthesis_cache.stats
+
+# Whole subgraph answers keyed by (subgraph, normalized human turns). The
+# earlier turns are part of the key because a follow-up like "which of them
+# run postgres?" means something different in every thread. The short TTL
+# bounds how stale a repeated question's answer can be, since the cached
+# answer skips the agents and so never sees newer infrastructure data
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 60.0
+_response_cache = _TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+RESPONSE_CACHE_STATS = _response_cache.stats
+
+# Counts and plain lookups are answered by the graph alone; semantic context
+# adds nothing there, so context_enhancer is skipped for them
+_LOOKUP_QUERY_RE = re.compile(r"(how many|count|list|show)\b")
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def _response_key(namespace: str, human_turns: list) -> tuple:
+    return (namespace, tuple(_normalize_query(turn) for turn in human_turns))
+
+def _make_query_intake(namespace: str):
+    """Build a node that records the user query and answers repeats from cache."""
+    
+    def query_intake_node(state):
+        """Record the user query and answer repeats from the response cache."""
+        messages = state["messages"]
+        human_turns = [
+            message_content(msg) for msg in messages if getattr(msg, "type", None) == "human"
+        ] or [message_content(messages[-1])]
+        # The latest human turn is the question being asked, as in
+        # extract_user_query; earlier turns of a thread are history
+        original_query = human_turns[-1]
+        response_key = _response_key(namespace, human_turns)
+        cached = _response_cache.get(response_key)
+        if cached is None:
+            return {
+                "original_query": original_query,
+                "response_key": response_key,
+                "response_cached": False,
+            }
+        return {
+            "original_query": original_query,
+            "response_key": response_key,
+            "messages": [{"role": "assistant", "content": cached}],
+            "response_cached": True,
+        }
+    
+    return query_intake_node
+
+# The fixed instructions go first as a system message so every synthesis
+# call shares the same prefix for provider-side prompt caching; only the
+# user message below varies per request
+SYNTHESIS_INSTRUCTIONS = """You combine infrastructure findings into one answer for the user.
+
+Create a comprehensive response that:
+1. Directly answers the user's question using the primary data
+2. Adds relevant context and insights where helpful
+3. Uses clear formatting with bullet points for lists
+4. Provides a brief summary
+
+Focus on being helpful and informative while avoiding redundancy."""
+
+SYNTHESIS_PROMPT = """User asked: "{query}"
+
+PRIMARY DATA (from database):
+{graph_data}
+
+CONTEXTUAL INSIGHTS (from pattern analysis):
+{context_data}"""
+
+NO_FINDINGS_MESSAGE = (
+    'No results found for: "{query}". Try rephrasing or broadening your query.'
+)
+
+class CachedQueryState(MessagesState):
+    """Subgraph state for subgraphs fronted by the response cache."""
+    original_query: str
+    # Response cache key for this turn, set by the intake node
+    response_key: tuple
+    response_cached: bool
+
+class DataState(CachedQueryState):
+    """Data subgraph state with collector findings keyed by collector."""
+    # Each collector merges in its own key, so concurrent writes don't clash
+    findings: Annotated[dict, operator.or_]
+
+@functools.lru_cache(maxsize=1)
 def create_data_subgraph():
     """Fixed data subgraph with specialized agent roles."""
     
-    # Create agents once at subgraph creation time
+    # Create agents and the synthesis LLM once at subgraph creation time
+    llm = get_llm()
     graph_agent = create_react_agent(
-        model=get_llm(),
+        model=llm,
         tools=[neo4j_query_tool],
         prompt=(
             "You are a database expert analyzing infrastructure queries.\n\n"
@@ -54,7 +167,7 @@ def create_data_subgraph():
     )
     
     vector_agent = create_react_agent(
-        model=get_llm(),
+        model=llm,
         tools=[vector_search_tool],
         prompt=(
             "You are a semantic search expert specializing in pattern recognition and similarity analysis.\n\n"
@@ -75,116 +188,161 @@ def create_data_subgraph():
         name="context_enhancer",
     )
     
-    def synthesis_node(state):
+    def route_after_intake(state):
+        if state.get("response_cached"):
+            return END
+        if _LOOKUP_QUERY_RE.match(_normalize_query(state["original_query"])):
+            return "graph_collector"
+        return ["graph_collector", "context_enhancer"]
+    
+    async def graph_collector_node(state):
+        """Run the database agent and record its answer under findings."""
+        result = await graph_agent.ainvoke({"messages": state["messages"]})
+        return {
+            "messages": result["messages"],
+            "findings": {"graph": message_content(result["messages"][-1]).strip()},
+        }
+    
+    async def context_enhancer_node(state):
+        """Run the semantic search agent and record its answer under findings."""
+        result = await vector_agent.ainvoke({"messages": state["messages"]})
+        return {
+            "messages": result["messages"],
+            "findings": {"vector": message_content(result["messages"][-1]).strip()},
+        }
+    
+    async def synthesis_node(state):
         """Combine structured data with contextual insights."""
-        original_query = extract_user_query(state)
-        
-        # Extract findings from both collectors
-        graph_data = ""
-        context_data = ""
-        
-        for msg in state["messages"]:
-            if hasattr(msg, 'name') or (isinstance(msg, dict) and 'name' in msg):
-                name = msg.get('name') if isinstance(msg, dict) else getattr(msg, 'name', None)
-                content = msg.get('content') if isinstance(msg, dict) else getattr(msg, 'content', '')
-                
-                if name == "graph_collector":
-                    graph_data = content
-                elif name == "context_enhancer":
-                    context_data = content
-        
-        # Create synthesis prompt
-        synthesis_prompt = f"""
-        User asked: "{original_query}"
+        original_query = state["original_query"]
+        graph_data = state["findings"].get("graph", "")
+        context_data = state["findings"].get("vector", "")
         
-        PRIMARY DATA (from database):
-        {graph_data}
+        # With at most one collector answering there is nothing to combine,
+        # so skip the LLM and return that answer (or a fixed reply) as is
+        if not (graph_data and context_data):
+            content = graph_data or context_data
+            if not content:
+                # Not cached, so the next ask retries the collectors
+                return {"messages": [{
+                    "role": "assistant", "content": NO_FINDINGS_MESSAGE.format(query=original_query)
+                }]}
+            _response_cache.put(state["response_key"], content)
+            return {"messages": [{"role": "assistant", "content": content}]}
         
-        CONTEXTUAL INSIGHTS (from pattern analysis):
-        {context_data}
-        
-        Create a comprehensive response that:
-        1. Directly answers the user's question using the primary data
-        2. Adds relevant context and insights where helpful
-        3. Uses clear formatting with bullet points for lists
-        4. Provides a brief summary
-        
-        Focus on being helpful and informative while avoiding redundancy.
-        """
-        
-        llm = get_llm()
-        response = llm.invoke(synthesis_prompt)
+        cache_key = hashlib.blake2b(
+            f"{original_query}\0{graph_data}\0{context_data}".encode(), digest_size=16
+        ).digest()
+        content = _synthesis_cache.get(cache_key)
+        if content is None:
+            # The prompt is only built when the cache can't answer
+            synthesis_prompt = SYNTHESIS_PROMPT.format(
+                query=original_query, graph_data=graph_data, context_data=context_data
+            )
+            content = (await llm.ainvoke([
+                ("system", SYNTHESIS_INSTRUCTIONS),
+                ("user", synthesis_prompt),
+            ])).content
+            _synthesis_cache.put(cache_key, content)
+        _response_cache.put(state["response_key"], content)
         
         return {
             "messages": [
-                {"role": "assistant", "content": response.content}
+                {"role": "assistant", "content": content}
             ]
         }
     
-    # Build workflow: Primary data → Context enhancement → Synthesis
-    workflow = StateGraph(MessagesState)
-    workflow.add_node("graph_collector", graph_agent)
-    workflow.add_node("context_enhancer", vector_agent)
+    # Build workflow: Intake → (Primary data || Context enhancement) → Synthesis,
+    # Intake → Primary data → Synthesis for lookups, or Intake → END when the
+    # response cache already has the answer.
+    # Both collectors only read the user query, so they run in the same step;
+    # add_messages and the findings reducer merge their concurrent writes.
+    # Synthesis is triggered once, in the step after whichever collectors ran.
+    # The nodes are async, so their LLM and tool waits overlap on the event
+    # loop; like the A2A orchestrator subgraph, run it with ainvoke/astream.
+    workflow = StateGraph(DataState)
+    workflow.add_node("query_intake", _make_query_intake("data"))
+    workflow.add_node("graph_collector", graph_collector_node)
+    workflow.add_node("context_enhancer", context_enhancer_node)
     workflow.add_node("synthesis", synthesis_node)
     
-    workflow.add_edge(START, "graph_collector")
-    workflow.add_edge("graph_collector", "context_enhancer")
+    workflow.add_edge(START, "query_intake")
+    workflow.add_conditional_edges(
+        "query_intake", route_after_intake, ["graph_collector", "context_enhancer", END]
+    )
+    workflow.add_edge("graph_collector", "synthesis")
     workflow.add_edge("context_enhancer", "synthesis")
     workflow.add_edge("synthesis", END)
     
     return workflow.compile()
 
-def create_security_subgraph():
-    """Security subgraph with external prompt."""
-    workflow = StateGraph(MessagesState)
+# Tools shared by the single-agent security/performance/compliance domains
+SPECIALIST_TOOLS = [neo4j_query_tool, vector_search_tool, security_approval_gate]
+
+# Answers that went through a human approval or proposed a knowledge update
+# are never replayed from cache: those tools have to run again every time
+_UNCACHEABLE_TOOLS = frozenset({
+    security_approval_gate.name,
+    "propose_knowledge_update",
+    "extract_learning_pattern",
+})
+
+def _create_single_agent_subgraph(agent_name: str, prompt_name: str, tools: list):
+    """Wrap one ReAct agent with an external prompt as a cached agent subgraph.
     
-    security_agent = create_react_agent(
+    START -> intake -> agent -> record_answer -> END, where intake ends the
+    run early with the cached answer for a repeated query.
+    """
+    workflow = StateGraph(CachedQueryState)
+    
+    agent = create_react_agent(
         model=get_llm(),
-        tools=[neo4j_query_tool, vector_search_tool, security_approval_gate],
-        prompt=load_prompt("security_domain"),
-        name="security_agent",
+        tools=tools,
+        prompt=load_prompt(prompt_name),
+        name=agent_name,
     )
     
-    workflow.add_node("security_agent", security_agent)
-    workflow.add_edge(START, "security_agent")
-    workflow.add_edge("security_agent", END)
+    def route_after_intake(state):
+        return END if state.get("response_cached") else agent_name
+    
+    def record_answer_node(state):
+        """Cache the agent's final answer unless an uncacheable tool ran."""
+        messages = state["messages"]
+        if any(
+            getattr(msg, "type", None) == "tool" and msg.name in _UNCACHEABLE_TOOLS
+            for msg in messages
+        ):
+            return {}
+        content = message_content(messages[-1])
+        if content.strip():
+            _response_cache.put(state["response_key"], content)
+        return {}
+    
+    workflow.add_node("query_intake", _make_query_intake(agent_name))
+    workflow.add_node(agent_name, agent)
+    workflow.add_node("record_answer", record_answer_node)
+    workflow.add_edge(START, "query_intake")
+    workflow.add_conditional_edges("query_intake", route_after_intake, [agent_name, END])
+    workflow.add_edge(agent_name, "record_answer")
+    workflow.add_edge("record_answer", END)
     
     return workflow.compile()
 
+@functools.lru_cache(maxsize=1)
+def create_security_subgraph():
+    """Security subgraph with external prompt."""
+    return _create_single_agent_subgraph("security_agent", "security_domain", SPECIALIST_TOOLS)
+
+@functools.lru_cache(maxsize=1)
 def create_performance_subgraph():
     """Performance subgraph with external prompt."""
-    workflow = StateGraph(MessagesState)
-    
-    performance_agent = create_react_agent(
-        model=get_llm(),
-        tools=[neo4j_query_tool, vector_search_tool, security_approval_gate],
-        prompt=load_prompt("performance_domain"),
-        name="performance_agent",
-    )
-    
-    workflow.add_node("performance_agent", performance_agent)
-    workflow.add_edge(START, "performance_agent")
-    workflow.add_edge("performance_agent", END)
-    
-    return workflow.compile()
+    return _create_single_agent_subgraph("performance_agent", "performance_domain", SPECIALIST_TOOLS)
 
+@functools.lru_cache(maxsize=1)
 def create_compliance_subgraph():
     """Compliance subgraph with external prompt."""
-    workflow = StateGraph(MessagesState)
-    
-    compliance_agent = create_react_agent(
-        model=get_llm(),
-        tools=[neo4j_query_tool, vector_search_tool, security_approval_gate],
-        prompt=load_prompt("compliance_domain"),
-        name="compliance_agent",
-    )
-    
-    workflow.add_node("compliance_agent", compliance_agent)
-    workflow.add_edge(START, "compliance_agent")
-    workflow.add_edge("compliance_agent", END)
-    
-    return workflow.compile()
+    return _create_single_agent_subgraph("compliance_agent", "compliance_domain", SPECIALIST_TOOLS)
 
+@functools.lru_cache(maxsize=1)
 def create_learning_subgraph():
     """Learning subgraph with external prompt."""
     
@@ -201,16 +359,8 @@ def create_learning_subgraph():
         """Extract reusable patterns from agent interactions."""
         return f"Pattern learned in {domain}: {pattern} (seen {frequency} times)"
     
-    learning_agent = create_react_agent(
-        model=get_llm(),
-        tools=[propose_knowledge_update, extract_learning_pattern],
-        prompt=load_prompt("learning_domain"),
-        name="learning_agent"
+    return _create_single_agent_subgraph(
+        "learning_agent",
+        "learning_domain",
+        [propose_knowledge_update, extract_learning_pattern],
     )
-    
-    workflow = StateGraph(MessagesState)
-    workflow.add_node("learning_agent", learning_agent)
-    workflow.add_edge(START, "learning_agent")
-    workflow.add_edge("learning_agent", END)
-    
-    return workflow.compile()
@@ -1,6 +1,4 @@
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+import functools
 
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.prebuilt import create_react_agent
@@ -14,6 +12,7 @@ from app.tools.rca_tools import (
 )
 from app.tools.data_tools import neo4j_query_tool, vector_search_tool
 
+@functools.lru_cache(maxsize=1)
 def create_rca_subgraph():
     """Pure agentic RCA subgraph - agent decides investigation approach autonomously."""
     workflow = StateGraph(MessagesState)
@@ -1,84 +1,76 @@
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+import functools
+import logging
 
-from langgraph.graph import StateGraph, START, END, MessagesState
+from langgraph.graph import StateGraph, START, END
 from app.graphs.domain_subgraphs import (
     create_data_subgraph, create_security_subgraph,
     create_performance_subgraph, create_compliance_subgraph,
     create_learning_subgraph
 )
 from app.graphs.rca_subgraph import create_rca_subgraph
-from app.graphs.a2a_orchestrator_subgraph import create_a2a_orchestrator_subgraph
+from app.graphs.a2a_orchestrator_subgraph import A2AOrchestratorState, create_a2a_orchestrator_subgraph
+from app.keyword_matcher import KeywordMatcher
+from app.state import extract_user_query
 
-def extract_user_query(state):
-    """Helper function to safely extract user query from state"""
-    first_message = state["messages"][-1]
-    
-    if isinstance(first_message, dict):
-        content = first_message.get("content", "")
-    else:
-        content = getattr(first_message, 'content', "")
-    
-    if isinstance(content, list):
-        content = " ".join(str(item) for item in content)
-    elif not isinstance(content, str):
-        content = str(content)
-    
-    return content
+logger = logging.getLogger(__name__)
+
+# Keyword routes in priority order: A2A orchestrator for external/current
+# information first, then the internal ops domains
+_ROUTES = (
+    ("a2a_orchestrator_domain", frozenset({
+        "latest", "current", "recent", "news", "today", "search", "web"
+    }), "External routing to A2A orchestrator"),
+    ("security_domain", frozenset({
+        "security", "vulnerability", "vulnerabilities", "threat", "threats", "compliance", "cve", "ssh",
+        "disable", "enable", "block", "allow", "patch", "remove", "delete", "modify"
+    }), "Security domain routing"),
+    ("rca_domain", frozenset({
+        "incident", "rca", "troubleshoot", "analyze", "investigation", "root cause"
+    }), "RCA domain routing"),
+    ("performance_domain", frozenset({
+        "performance", "monitor", "monitoring", "metric", "metrics", "optimization"
+    }), "Performance domain routing"),
+    ("compliance_domain", frozenset({
+        "compliance", "audit", "auditing", "policy", "policies", "regulation"
+    }), "Compliance domain routing"),
+    ("learning_domain", frozenset({
+        "learn", "learning", "pattern", "patterns", "knowledge", "update"
+    }), "Learning domain routing"),
+)
+# Keyword -> index of the highest-priority route listing it; walking the
+# routes in reverse lets earlier routes overwrite shared keywords
+_KEYWORD_ROUTE = {
+    keyword: index
+    for index, (_, keywords, _) in reversed(list(enumerate(_ROUTES)))
+    for keyword in keywords
+}
+_ROUTE_MATCHER = KeywordMatcher(_KEYWORD_ROUTE)
+
+def route_query(state):
+    """Simple, reliable routing function that delegates to A2A orchestrator when needed"""
+    user_query = extract_user_query(state)
+    query_lower = user_query.lower()
 
+    logger.debug("Routing query: '%s'", user_query)
+
+    # One matcher pass finds every keyword; the highest-priority hit wins
+    matched = _ROUTE_MATCHER.matches(query_lower)
+    if matched:
+        domain, _, description = _ROUTES[min(_KEYWORD_ROUTE[keyword] for keyword in matched)]
+        logger.debug(description)
+        return domain
+
+    # Default to data domain for infrastructure, servers, databases, etc.
+    logger.debug("Default data domain routing")
+    return "data_domain"
+
+@functools.lru_cache(maxsize=1)
 def create_supervisor():
     """Enhanced supervisor with A2A orchestrator integration"""
     
-    def route_query(state):
-        """Simple, reliable routing function that delegates to A2A orchestrator when needed"""
-        user_query = extract_user_query(state)
-        query_lower = user_query.lower()
-        
-        print(f"DEBUG: Routing query: '{user_query}'")
-        
-        # A2A orchestrator routing - for external/current information
-        if any(word in query_lower for word in ["latest", "current", "recent", "news", "today", "search", "web"]):
-            print(f"DEBUG: External routing to A2A orchestrator")
-            return "a2a_orchestrator_domain"
-        
-        # Internal ops domain routing (your existing working logic)
-        if any(word in query_lower for word in ["security", "vulnerability", "vulnerabilities", "threat", "threats", "compliance", "cve", "ssh", "disable", "enable", "block", "allow", "patch", "remove", "delete", "modify"]):
-            print(f"DEBUG: Security domain routing")
-            return "security_domain"
-        elif any(word in query_lower for word in ["incident", "rca", "troubleshoot", "analyze", "investigation", "root cause"]):
-            print(f"DEBUG: RCA domain routing")
-            return "rca_domain"
-        elif any(word in query_lower for word in ["performance", "monitor", "monitoring", "metric", "metrics", "optimization"]):
-            print(f"DEBUG: Performance domain routing")
-            return "performance_domain"
-        elif any(word in query_lower for word in ["compliance", "audit", "auditing", "policy", "policies", "regulation"]):
-            print(f"DEBUG: Compliance domain routing")
-            return "compliance_domain"
-        elif any(word in query_lower for word in ["learn", "learning", "pattern", "patterns", "knowledge", "update"]):
-            print(f"DEBUG: Learning domain routing")
-            return "learning_domain"
-        else:
-            # Default to data domain for infrastructure, servers, databases, etc.
-            print(f"DEBUG: Default data domain routing")
-            return "data_domain"
-    
-    def supervisor_node(state):
-        """Supervisor node that adds routing info to state"""
-        user_query = extract_user_query(state)
-        return {
-            "messages": [
-                {
-                    "role": "assistant", 
-                    "content": f"Analyzing query: '{user_query}' and routing to appropriate domain...", 
-                    "name": "supervisor"
-                }
-            ]
-        }
-    
     # Main workflow
-    workflow = StateGraph(MessagesState)
-    workflow.add_node("supervisor", supervisor_node)
+    # Carries a2a_context_id between the caller and the A2A domain
+    workflow = StateGraph(A2AOrchestratorState)
     
     # Add all existing internal domains
     workflow.add_node("data_domain", create_data_subgraph())
@@ -91,10 +83,11 @@ def create_supervisor():
     # Add A2A orchestrator domain for external information
     workflow.add_node("a2a_orchestrator_domain", create_a2a_orchestrator_subgraph())
     
-    # Flow: Start -> Supervisor -> Route to appropriate domain -> End
-    workflow.add_edge(START, "supervisor")
+    # Flow: Start -> Route to appropriate domain -> End. Routing is a
+    # conditional edge off START, so no routing note is added to the
+    # messages every domain agent is prompted with
     workflow.add_conditional_edges(
-        "supervisor",
+        START,
         route_query,
         {
             "data_domain": "data_domain",
@@ -0,0 +1,32 @@
+from typing import Iterable, Set
+
+try:
+    import ahocorasick
+except ImportError:
+    # Optional C accelerator (pip install xaiops-graphrag[routing])
+    ahocorasick = None
+
+class KeywordMatcher:
+    """Find which of a fixed set of keywords occur as substrings of a text.
+
+    Keywords are compiled once into an Aho-Corasick automaton so a lookup is a
+    single C-level pass over the text. Without pyahocorasick installed this
+    falls back to one `in` check per keyword, with identical results.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(keyword for keyword in keywords if keyword))
+        self._automaton = None
+
+        if ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def matches(self, text: str) -> Set[str]:
+        """Return the set of keywords contained in text."""
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text)}
+        return {keyword for keyword in self.keywords if keyword in text}
@@ -3,8 +3,13 @@
 LlamaStack A2A Agent using proper A2A SDK
 """
 import asyncio
+import functools
 import json
 import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
 import httpx
 import uvicorn
 
@@ -21,9 +26,16 @@ from a2a.types import (
 from a2a.utils import new_agent_text_message, new_task
 from a2a.utils.errors import ServerError
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+LLAMASTACK_TIMEOUT = httpx.Timeout(60.0)
+LLAMASTACK_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+# LlamaStack sessions kept per A2A context, least recently used dropped first
+SESSION_CACHE_SIZE = 1024
+# Turn errors that mean the cached session is gone. 400 is left out: it is a
+# bad request, and retrying it in a new session would only fail again
+_STALE_SESSION_STATUSES = frozenset({404, 410})
+
 class LlamaStackAgentExecutor(AgentExecutor):
     """LlamaStack Agent Executor for web search using correct endpoint"""
     
@@ -31,7 +43,31 @@ class LlamaStackAgentExecutor(AgentExecutor):
         # LlamaStack configuration from working curl command
         self.base_url = "https://lss-lss.apps.prod.rhoai.rh-aiservices-bu.com/v1"
         self.agent_id = "b35d9295-552a-4b75-8fd9-8a4b9e1bef26"
-        
+        # Pooled client so every search reuses the TLS connection to LlamaStack
+        self._http: Optional[httpx.AsyncClient] = None
+        # A2A contextId -> LlamaStack session_id, so a conversation's turns
+        # share one session instead of creating a new one per query
+        self._sessions: OrderedDict = OrderedDict()
+        # Serializes session creation so concurrent first turns of one
+        # conversation share a session instead of each creating their own
+        self._session_lock = asyncio.Lock()
+    
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled HTTP client shared by all LlamaStack calls"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=LLAMASTACK_TIMEOUT,
+                limits=LLAMASTACK_LIMITS,
+                http2=True,
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     async def create_session(self, client: httpx.AsyncClient) -> str:
         """Create a new session for the LlamaStack agent"""
         session_url = f"{self.base_url}/agents/{self.agent_id}/session"
@@ -54,75 +90,113 @@ class LlamaStackAgentExecutor(AgentExecutor):
         if not session_id:
             raise Exception(f"Failed to get session_id from response: {session_data}")
             
-        logger.info(f"Created LlamaStack session: {session_id}")
+        logger.info("Created LlamaStack session: %s", session_id)
         return session_id
 
-    async def call_llamastack(self, query: str) -> str:
-        """Call LlamaStack endpoint with session creation and turn execution"""
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # Step 1: Create session
+    async def get_session(self, client: httpx.AsyncClient, context_id: str) -> str:
+        """Get the LlamaStack session for an A2A context, creating it on first use"""
+        session_id = self._sessions.get(context_id)
+        if session_id is not None:
+            self._sessions.move_to_end(context_id)
+            return session_id
+        
+        async with self._session_lock:
+            # Another turn may have created it while this one waited
+            session_id = self._sessions.get(context_id)
+            if session_id is None:
                 session_id = await self.create_session(client)
-                
-                # Step 2: Execute turn with streaming
-                turn_url = f"{self.base_url}/agents/{self.agent_id}/session/{session_id}/turn"
-                
-                headers = {
-                    "accept": "text/event-stream",
-                    "Cache-Control": "no-cache",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "stream": True,
-                    "messages": [{"role": "user", "content": query}]
-                }
-                
-                logger.info(f"Sending query to LlamaStack: {query}")
-                
-                async with client.stream("POST", turn_url, headers=headers, json=payload) as response:
-                    response.raise_for_status()
-                    
-                    result_text = ""
+                self._sessions[context_id] = session_id
+                if len(self._sessions) > SESSION_CACHE_SIZE:
+                    self._sessions.popitem(last=False)
+            return session_id
+
+    async def run_turn(self, client: httpx.AsyncClient, session_id: str, query: str) -> str:
+        """Execute one streamed turn in a LlamaStack session and return its text"""
+        turn_url = f"{self.base_url}/agents/{self.agent_id}/session/{session_id}/turn"
+        
+        headers = {
+            "accept": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "stream": True,
+            "messages": [{"role": "user", "content": query}]
+        }
+        
+        logger.info("Sending query to LlamaStack: %s", query)
+        
+        async with client.stream("POST", turn_url, headers=headers, json=payload) as response:
+            if response.is_error:
+                # Read the error body while the stream is open, so the
+                # HTTPStatusError handler in call_llamastack can report it
+                await response.aread()
+            response.raise_for_status()
+            
+            result_parts = []
+            
+            async for line in response.aiter_lines():
+                # Only text deltas and turn completion are used; step start/end
+                # and other events are skipped without being decoded
+                if not line.startswith("data: ") or (
+                    "step_progress" not in line and "turn_complete" not in line
+                ):
+                    continue
+                try:
+                    data = json.loads(line[6:])
                     
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            try:
-                                data = json.loads(line[6:])
+                    # Parse the SSE event structure from your working curl
+                    if "event" in data and "payload" in data["event"]:
+                        payload_data = data["event"]["payload"]
+                        event_type = payload_data.get("event_type")
+                        
+                        # Handle step progress with text deltas
+                        if event_type == "step_progress":
+                            delta = payload_data.get("delta") or {}
+                            if delta.get("type") == "text":
+                                text_content = delta.get("text", "")
+                                if text_content:
+                                    result_parts.append(text_content)
+                        
+                        # Handle turn completion
+                        elif event_type == "turn_complete":
+                            turn_data = payload_data.get("turn", {})
+                            output_message = turn_data.get("output_message", {})
+                            if output_message.get("content"):
+                                # Use the complete response if available
+                                return output_message["content"]
                                 
-                                # Parse the SSE event structure from your working curl
-                                if "event" in data and "payload" in data["event"]:
-                                    payload_data = data["event"]["payload"]
-                                    
-                                    # Handle step progress with text deltas
-                                    if (payload_data.get("event_type") == "step_progress" and 
-                                        "delta" in payload_data and 
-                                        payload_data["delta"].get("type") == "text"):
-                                        
-                                        text_content = payload_data["delta"].get("text", "")
-                                        if text_content:
-                                            result_text += text_content
-                                    
-                                    # Handle turn completion
-                                    elif payload_data.get("event_type") == "turn_complete":
-                                        turn_data = payload_data.get("turn", {})
-                                        output_message = turn_data.get("output_message", {})
-                                        if output_message.get("content"):
-                                            # Use the complete response if available
-                                            return output_message["content"]
-                                            
-                            except json.JSONDecodeError:
-                                continue
-                            except Exception as e:
-                                logger.warning(f"Error parsing SSE data: {e}")
-                                continue
-                    
-                    return result_text.strip() if result_text else "No web search results received"
-                    
+                except json.JSONDecodeError:
+                    continue
+                except Exception as e:
+                    logger.warning("Error parsing SSE data: %s", e)
+                    continue
+            
+            result_text = "".join(result_parts).strip()
+            return result_text if result_text else "No web search results received"
+
+    async def call_llamastack(self, query: str, context_id: str) -> str:
+        """Call LlamaStack endpoint in the session for context_id"""
+        try:
+            client = self.get_http_client()
+            session_id = await self.get_session(client, context_id)
+            try:
+                return await self.run_turn(client, session_id, query)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in _STALE_SESSION_STATUSES:
+                    raise
+                # The session expired or was deleted server-side; start a new
+                # one, unless a concurrent turn already replaced it
+                if self._sessions.get(context_id) == session_id:
+                    del self._sessions[context_id]
+                session_id = await self.get_session(client, context_id)
+                return await self.run_turn(client, session_id, query)
+        
         except httpx.HTTPStatusError as e:
             return f"LlamaStack HTTP error {e.response.status_code}: {e.response.text}"
         except Exception as e:
-            logger.error(f"LlamaStack error: {e}")
+            logger.error("LlamaStack error: %s", e)
             return f"Web search error: {str(e)}"
 
     async def execute(
@@ -131,7 +205,7 @@ class LlamaStackAgentExecutor(AgentExecutor):
         event_queue: EventQueue,
     ) -> None:
         query = context.get_user_input()
-        logger.info(f"Processing web search query: {query}")
+        logger.info("Processing web search query: %s", query)
         
         task = context.current_task
         if not task:
@@ -153,7 +227,7 @@ class LlamaStackAgentExecutor(AgentExecutor):
                 ),
             )
             
-            search_result = await self.call_llamastack(query)
+            search_result = await self.call_llamastack(query, task.contextId)
             
             await updater.add_artifact(
                 [Part(root=TextPart(text=search_result))],
@@ -162,45 +236,44 @@ class LlamaStackAgentExecutor(AgentExecutor):
             await updater.complete()
 
         except Exception as e:
-            logger.error(f'Error processing web search: {e}')
+            logger.error('Error processing web search: %s', e)
             raise ServerError(error=InternalError()) from e
 
-    def _validate_request(self, context: RequestContext) -> bool:
-        return False
-
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
         raise ServerError(error=UnsupportedOperationError())
 
+# Static skill list for the web search agent card
+_LLAMASTACK_SKILLS = [
+    AgentSkill(
+        id="web_search",
+        name="Web Search",
+        description="Real-time web search and current information",
+        tags=["web", "search", "current", "news", "latest", "internet"]
+    ),
+    AgentSkill(
+        id="current_events", 
+        name="Current Events",
+        description="Latest news and current events information",
+        tags=["news", "current", "events", "recent", "today"]
+    )
+]
+
+@functools.lru_cache(maxsize=8)
 def create_llamastack_agent_card(host: str = "localhost", port: int = 8002) -> AgentCard:
     """Create agent card for LlamaStack web search"""
-    skills = [
-        AgentSkill(
-            id="web_search",
-            name="Web Search",
-            description="Real-time web search and current information",
-            tags=["web", "search", "current", "news", "latest", "internet"]
-        ),
-        AgentSkill(
-            id="current_events", 
-            name="Current Events",
-            description="Latest news and current events information",
-            tags=["news", "current", "events", "recent", "today"]
-        )
-    ]
-    
     return AgentCard(
         name="Web Search Agent",
         description="Real-time web search using LlamaStack",
         url=f"http://{host}:{port}/",
         version="1.0.0",
         capabilities=AgentCapabilities(
-            streaming=False,
+            streaming=True,
             pushNotifications=True,
             stateTransitionHistory=False
         ),
-        skills=skills,
+        skills=_LLAMASTACK_SKILLS,
         defaultInputModes=["text"],
         defaultOutputModes=["text"]
     )
@@ -209,8 +282,15 @@ def create_llamastack_server(host: str = "localhost", port: int = 8002):
     """Create LlamaStack A2A server"""
     agent_card = create_llamastack_agent_card(host, port)
     
+    agent_executor = LlamaStackAgentExecutor()
+    
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await agent_executor.aclose()
+    
     request_handler = DefaultRequestHandler(
-        agent_executor=LlamaStackAgentExecutor(),
+        agent_executor=agent_executor,
         task_store=InMemoryTaskStore(),
     )
     
@@ -219,8 +299,10 @@ def create_llamastack_server(host: str = "localhost", port: int = 8002):
         http_handler=request_handler
     )
     
-    return server.build()
+    return server.build(lifespan=lifespan)
 
 if __name__ == "__main__":
+    # Configure logging once, at the process entry point
+    logging.basicConfig(level=logging.INFO)
     app = create_llamastack_server()
-    uvicorn.run(app, host="localhost", port=8002)
\ No newline at end of file
+    uvicorn.run(app, host="localhost", port=8002, loop="uvloop", http="httptools")
\ No newline at end of file
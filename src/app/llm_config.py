@@ -1,14 +1,18 @@
-import sys
+import functools
 import os
-sys.path.append(os.path.dirname(__file__))
 
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+@functools.lru_cache(maxsize=8)
 def get_llm(temperature: float = 0) -> ChatOpenAI:
-    """Get configured LLM instance."""
+    """Get configured LLM instance, shared per temperature.
+
+    ChatOpenAI is safe to reuse across calls, so nodes that call get_llm()
+    per request reuse one client and its HTTP connection pool.
+    """
     return ChatOpenAI(
         base_url=os.getenv("LLM_BASE_URL"),
         api_key=os.getenv("LLM_API_KEY"),
@@ -1,5 +1 @@
-import sys
-import os
-sys.path.append(os.path.dirname(__file__))
-
 from app.graph import app
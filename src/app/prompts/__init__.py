@@ -1,8 +1,9 @@
-import os
+import functools
 from pathlib import Path
 
+@functools.lru_cache(maxsize=None)
 def load_prompt(prompt_name: str) -> str:
-    """Load a prompt template from the prompts directory."""
+    """Load a prompt template from the prompts directory, once per name."""
     prompts_dir = Path(__file__).parent
     prompt_file = prompts_dir / f"{prompt_name}.md"
     
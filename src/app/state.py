@@ -1,4 +1,5 @@
-from typing import TypedDict, List, Dict, Any, Literal, Optional, Annotated
+from typing import TypedDict, List, Dict, Any, Literal, Optional, Annotated, Union
+from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
 class AppState(TypedDict, total=False):
@@ -21,3 +22,24 @@ def initial_state(user_input: Optional[str] = None) -> AppState:
         "is_complete": False,
         "meta": {"run_id": "temp", "step_count": 0}
     }
+
+def message_content(message: Union[BaseMessage, Dict[str, Any]]) -> str:
+    """Return a message's content as text, for LangChain or dict messages."""
+    # Inside a graph add_messages has already turned dicts into BaseMessages
+    if isinstance(message, BaseMessage):
+        content = message.content
+    elif isinstance(message, dict):
+        content = message.get("content", "")
+    else:
+        content = getattr(message, "content", "")
+    
+    # Plain text is the common case; str subclasses fall through to str()
+    if type(content) is str:
+        return content
+    if isinstance(content, list):
+        return " ".join(str(item) for item in content)
+    return str(content)
+
+def extract_user_query(state: Dict[str, Any]) -> str:
+    """Return the text of the latest message in state."""
+    return message_content(state["messages"][-1])
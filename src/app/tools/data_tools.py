@@ -208,22 +208,26 @@ def neo4j_query_tool(query_type: str, search_term: str = "", limit: int = 10) ->
         elif query_type == "service_health":
             if not search_term:
                 return "Error: service_name required for service_health query"
+            # Each OPTIONAL MATCH is aggregated before the next, so rows grow
+            # with dependencies + dependents rather than their product
             query = """
             MATCH (s:Service)
             WHERE s.name = $service_name OR s.name CONTAINS $service_name
             OPTIONAL MATCH (s)-[dep:DEPENDS_ON]->(dependency)
-            OPTIONAL MATCH (s)<-[used:USES]-(dependent)
-            RETURN s.name as service_name,
-                   s.status as current_status,
-                   s.health_check_url as health_url,
-                   collect(DISTINCT {
+            WITH s, collect(DISTINCT {
                        dependency: dependency.name,
                        dependency_type: labels(dependency)[0]
-                   })[0..10] as dependencies,
-                   collect(DISTINCT {
+                   })[0..10] as dependencies
+            OPTIONAL MATCH (s)<-[used:USES]-(dependent)
+            WITH s, dependencies, collect(DISTINCT {
                        dependent: dependent.name,
                        dependent_type: labels(dependent)[0]
                    })[0..10] as dependents
+            RETURN s.name as service_name,
+                   s.status as current_status,
+                   s.health_check_url as health_url,
+                   dependencies,
+                   dependents
             ORDER BY s.name
             LIMIT $limit
             """
@@ -285,23 +289,32 @@ def neo4j_query_tool(query_type: str, search_term: str = "", limit: int = 10) ->
         elif query_type == "system_context":
             if not search_term:
                 return "Error: system_name required for system_context query"
+            # Direct neighbors are aggregated before the 2-hop match, so it
+            # runs once per system instead of once per neighbor row. The
+            # any(...) test keeps the old per-row filter's result: a 2-hop
+            # node is dropped only when it is the system's sole neighbor
             query = """
             MATCH (system)
             WHERE system.name = $system_name OR 
                   any(prop in keys(system) WHERE toString(system[prop]) CONTAINS $system_name)
             OPTIONAL MATCH (system)-[r1]-(direct_neighbor)
+            WITH system,
+                 collect(DISTINCT {
+                     neighbor: direct_neighbor.name,
+                     neighbor_type: labels(direct_neighbor)[0],
+                     relationship: type(r1),
+                     neighbor_properties: properties(direct_neighbor)
+                 })[0..10] as direct_context,
+                 collect(DISTINCT direct_neighbor) as neighbors
             OPTIONAL MATCH (system)-[*2..2]-(second_degree)
-            WHERE second_degree <> system AND second_degree <> direct_neighbor
+            WHERE second_degree <> system AND
+                  any(neighbor in neighbors WHERE neighbor <> second_degree)
+            WITH system, direct_context, collect(DISTINCT second_degree.name)[0..5] as extended_context
             RETURN system.name as system_name,
                    labels(system) as system_types,
                    properties(system) as system_properties,
-                   collect(DISTINCT {
-                       neighbor: direct_neighbor.name,
-                       neighbor_type: labels(direct_neighbor)[0],
-                       relationship: type(r1),
-                       neighbor_properties: properties(direct_neighbor)
-                   })[0..10] as direct_context,
-                   collect(DISTINCT second_degree.name)[0..5] as extended_context
+                   direct_context,
+                   extended_context
             ORDER BY system.name
             LIMIT $limit
             """
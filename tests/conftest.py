@@ -0,0 +1,4 @@
+import os
+
+# get_llm reads the key when a subgraph is built; tests never reach the API
+os.environ.setdefault("LLM_API_KEY", "test")
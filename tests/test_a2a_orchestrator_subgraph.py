@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import app.graphs.a2a_orchestrator_subgraph as a2a_subgraph
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    """Fake A2A orchestrator that records each message/send it receives"""
+    sent = []
+    
+    async def handler(request):
+        body = json.loads(request.content)
+        if body["method"] == "message/stream":
+            # Plain JSON reply: streaming unsupported, fall back to message/send
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": {}})
+        message = body["params"]["message"]
+        sent.append((message["contextId"], message["parts"][0]["text"]))
+        # Stay in flight long enough for concurrent callers to overlap
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": {
+            "id": f"task-{len(sent)}",
+            "status": {"state": "completed"},
+            "artifacts": [{"parts": [{"kind": "text", "text": f"answer {len(sent)}"}]}],
+        }})
+    
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(a2a_subgraph, "get_a2a_http_client", lambda: client)
+    return sent
+
+
+def _turn(query, context_id=None):
+    state = {"messages": [{"role": "user", "content": query}]}
+    if context_id:
+        state["a2a_context_id"] = context_id
+    return state
+
+
+@pytest.mark.asyncio
+async def test_identical_first_turns_share_a_call(orchestrator):
+    graph = a2a_subgraph.create_a2a_orchestrator_subgraph()
+    
+    results = await asyncio.gather(*[graph.ainvoke(_turn("latest news")) for _ in range(3)])
+    
+    assert len(orchestrator) == 1
+    assert {result["messages"][-1].content for result in results} == {"External Agent Response:\n\nanswer 1"}
+    # Each caller still gets a conversation of its own
+    assert len({result["a2a_context_id"] for result in results}) == 3
+    assert not a2a_subgraph._inflight
+
+
+@pytest.mark.asyncio
+async def test_later_turns_are_not_coalesced(orchestrator):
+    graph = a2a_subgraph.create_a2a_orchestrator_subgraph()
+    
+    first, second = await asyncio.gather(
+        graph.ainvoke(_turn("which of them failed?", "ctx-a")),
+        graph.ainvoke(_turn("which of them failed?", "ctx-b")),
+    )
+    
+    assert sorted(orchestrator) == [("ctx-a", "which of them failed?"), ("ctx-b", "which of them failed?")]
+    assert first["a2a_context_id"] == "ctx-a"
+    assert second["a2a_context_id"] == "ctx-b"
+
+
+@pytest.mark.asyncio
+async def test_different_first_turns_are_not_coalesced(orchestrator):
+    graph = a2a_subgraph.create_a2a_orchestrator_subgraph()
+    
+    await asyncio.gather(
+        graph.ainvoke(_turn("latest news")),
+        graph.ainvoke(_turn("kubernetes releases")),
+    )
+    
+    assert len(orchestrator) == 2
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+import app.a2a_orchestrator as a2a_orchestrator
+from app.a2a_ops_server import create_ops_agent_card
+from app.llamastack_a2a_agent import create_llamastack_agent_card
+
+WEB_ENDPOINT = "http://localhost:8002"
+CARDS = {8001: create_ops_agent_card(), 8002: create_llamastack_agent_card()}
+
+
+class FakeAgents:
+    """Serves the agent cards; failures[port] probes of a port fail first"""
+    
+    def __init__(self):
+        self.failures = {}
+        self.probes = []
+    
+    def __call__(self, request):
+        port = request.url.port
+        self.probes.append(port)
+        if self.failures.get(port, 0) > 0:
+            self.failures[port] -= 1
+            raise httpx.ConnectError("connection refused")
+        card = CARDS[request.url.port]
+        return httpx.Response(200, json=card.model_dump(mode="json", exclude_none=True, by_alias=True))
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = tmp_path / "xaiops" / "agent_cards.json"
+    monkeypatch.setattr(a2a_orchestrator, "CARD_CACHE_PATH", path)
+    monkeypatch.setattr(a2a_orchestrator, "CARD_REPROBE_INITIAL_DELAY", 0.0)
+    return path
+
+
+@pytest.fixture
+def agents():
+    return FakeAgents()
+
+
+async def _start(agents):
+    orchestrator = a2a_orchestrator.SmartOrchestrator()
+    orchestrator._http = httpx.AsyncClient(transport=httpx.MockTransport(agents))
+    await orchestrator.initialize_agents()
+    return orchestrator
+
+
+def _cache_only(path, *ports):
+    entries = {
+        f"http://localhost:{port}": {
+            "fetched_at": a2a_orchestrator.time.time(),
+            "card": CARDS[port].model_dump(mode="json", exclude_none=True, by_alias=True),
+        }
+        for port in ports
+    }
+    a2a_orchestrator._save_card_cache(path, entries)
+
+
+@pytest.mark.asyncio
+async def test_cache_file_is_private(cache_path, agents):
+    await _start(agents)
+    
+    assert os.stat(cache_path).st_mode & 0o777 == 0o600
+    assert os.stat(cache_path.parent).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.asyncio
+async def test_writable_cache_is_ignored(cache_path, agents):
+    _cache_only(cache_path, 8001, 8002)
+    os.chmod(cache_path, 0o666)
+    
+    await _start(agents)
+    
+    assert sorted(agents.probes) == [8001, 8002]
+
+
+@pytest.mark.asyncio
+async def test_revalidation_keeps_endpoint_order(cache_path, agents):
+    # Ops is registered from the cache, Web is fetched at startup
+    _cache_only(cache_path, 8001)
+    orchestrator = await _start(agents)
+    await orchestrator._card_revalidation
+    
+    assert list(orchestrator.agents) == ["Ops Infrastructure Agent", "Web Search Agent"]
+
+
+@pytest.mark.asyncio
+async def test_unreachable_cached_agent_is_reprobed(cache_path, agents):
+    _cache_only(cache_path, 8001, 8002)
+    agents.failures[8001] = 2
+    orchestrator = await _start(agents)
+    
+    await asyncio.wait_for(orchestrator._card_revalidation, 1.0)
+    
+    assert agents.probes == [8001, 8002, 8001, 8001]
+    assert list(orchestrator.agents) == ["Ops Infrastructure Agent", "Web Search Agent"]
+
+
+@pytest.mark.asyncio
+async def test_unreachable_cached_agent_leaves_routing_but_not_the_cache(cache_path, agents, monkeypatch):
+    monkeypatch.setattr(a2a_orchestrator, "CARD_REPROBE_INITIAL_DELAY", 30.0)
+    _cache_only(cache_path, 8001, 8002)
+    agents.failures[8002] = 1
+    orchestrator = await _start(agents)
+    
+    # The first re-probe drops the agent, then the retry waits out its backoff
+    while "Web Search Agent" in orchestrator.agents:
+        await asyncio.sleep(0.01)
+    
+    assert list(orchestrator.agents) == ["Ops Infrastructure Agent"]
+    assert WEB_ENDPOINT in json.loads(cache_path.read_text())
+    
+    revalidation = orchestrator._card_revalidation
+    await orchestrator.aclose()
+    assert revalidation.cancelled()
+    assert orchestrator._http is None
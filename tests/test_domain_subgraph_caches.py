@@ -0,0 +1,148 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import app.graphs.domain_subgraphs as domain_subgraphs
+from app.graphs.domain_subgraphs import _TTLCache
+
+
+class EchoModel(GenericFakeChatModel):
+    """Answers with the latest human turn and counts its calls"""
+    
+    calls: int = 0
+    
+    def bind_tools(self, tools, **kwargs):
+        return self
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        question = [msg for msg in messages if msg.type in ("human", "user")][-1]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"ans:{question.content}"))])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(domain_subgraphs.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fresh subgraphs and caches around a counting fake model"""
+    model = EchoModel(messages=iter([]))
+    monkeypatch.setattr(domain_subgraphs, "get_llm", lambda *args, **kwargs: model)
+    monkeypatch.setattr(domain_subgraphs, "_response_cache", _TTLCache(16, 60.0))
+    monkeypatch.setattr(domain_subgraphs, "_synthesis_cache", _TTLCache(16, 300.0))
+    factories = (
+        domain_subgraphs.create_data_subgraph,
+        domain_subgraphs.create_performance_subgraph,
+        domain_subgraphs.create_learning_subgraph,
+    )
+    for factory in factories:
+        factory.cache_clear()
+    yield model
+    for factory in factories:
+        factory.cache_clear()
+
+
+def test_ttl_cache_hit_and_miss(clock):
+    cache = _TTLCache(maxsize=4, ttl=10.0)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_ttl_cache_expiry(clock):
+    cache = _TTLCache(maxsize=4, ttl=10.0)
+    cache.put("a", 1)
+    clock.now += 9.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    # Expired entries are dropped, not just hidden
+    assert "a" not in cache._entries
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    cache = _TTLCache(maxsize=2, ttl=10.0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("factory", ["create_data_subgraph", "create_performance_subgraph"])
+async def test_repeated_query_is_answered_from_cache(llm, factory):
+    graph = getattr(domain_subgraphs, factory)()
+    
+    first = await graph.ainvoke({"messages": [HumanMessage("Why is db01 slow?")]})
+    calls = llm.calls
+    second = await graph.ainvoke({"messages": [HumanMessage("why is  DB01 slow?")]})
+    
+    assert first["response_cached"] is False
+    assert second["response_cached"] is True
+    assert second["messages"][-1].content == first["messages"][-1].content
+    assert llm.calls == calls
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("factory", ["create_data_subgraph", "create_performance_subgraph"])
+async def test_follow_up_turn_is_not_replayed(llm, factory):
+    graph = getattr(domain_subgraphs, factory)()
+    
+    first = await graph.ainvoke({"messages": [HumanMessage("list all servers")]})
+    history = first["messages"] + [HumanMessage("which of them run postgres?")]
+    second = await graph.ainvoke({"messages": history})
+    
+    assert second["original_query"] == "which of them run postgres?"
+    assert second["response_cached"] is False
+    assert "which of them run postgres?" in second["messages"][-1].content
+
+
+@pytest.mark.asyncio
+async def test_synthesis_reuses_cached_answer_for_same_findings(llm, monkeypatch):
+    graph = domain_subgraphs.create_data_subgraph()
+    
+    await graph.ainvoke({"messages": [HumanMessage("Why is db01 slow?")]})
+    # Both collectors and synthesis ran
+    assert llm.calls == 3
+    
+    # With the response cache gone the collectors run again, but their
+    # findings are unchanged so synthesis is served from its own cache
+    monkeypatch.setattr(domain_subgraphs, "_response_cache", _TTLCache(16, 60.0))
+    await graph.ainvoke({"messages": [HumanMessage("Why is db01 slow?")]})
+    assert llm.calls == 5
+    assert domain_subgraphs._synthesis_cache.stats == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.parametrize("tool_name", ["security_approval_gate", "propose_knowledge_update"])
+def test_answers_from_side_effecting_tools_are_not_cached(llm, tool_name):
+    graph = domain_subgraphs.create_learning_subgraph()
+    record_answer = graph.builder.nodes["record_answer"].runnable
+    
+    record_answer.invoke({
+        "original_query": "learn",
+        "response_key": ("learning_agent", ("learn",)),
+        "messages": [
+            HumanMessage("learn"),
+            ToolMessage("ok", name=tool_name, tool_call_id="1"),
+            AIMessage("done"),
+        ],
+    })
+    
+    assert not domain_subgraphs._response_cache._entries
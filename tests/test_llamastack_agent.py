@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.llamastack_a2a_agent import LlamaStackAgentExecutor
+
+
+async def _streamed(body):
+    # A generator body keeps the response unread, as on a real client.stream
+    yield body
+
+
+class FakeLlamaStack:
+    """Minimal LlamaStack agent API whose sessions can be expired"""
+    
+    def __init__(self, expired_status=404):
+        self.expired_status = expired_status
+        self.sessions_created = 0
+        self.expired = set()
+        self.turns = []
+    
+    async def __call__(self, request):
+        if request.url.path.endswith("/session"):
+            self.sessions_created += 1
+            # Give concurrent turns the chance to race on session creation
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"session_id": f"s{self.sessions_created}"})
+        session_id = request.url.path.split("/")[-2]
+        self.turns.append(session_id)
+        if session_id in self.expired:
+            return httpx.Response(self.expired_status, content=_streamed(b'{"detail": "session not found"}'))
+        event = {"event": {"payload": {
+            "event_type": "turn_complete",
+            "turn": {"output_message": {"content": f"answer from {session_id}"}},
+        }}}
+        return httpx.Response(
+            200,
+            content=_streamed(f"data: {json.dumps(event)}\n\n".encode()),
+            headers={"content-type": "text/event-stream"},
+        )
+
+
+def _executor(server):
+    executor = LlamaStackAgentExecutor()
+    executor._http = httpx.AsyncClient(transport=httpx.MockTransport(server))
+    return executor
+
+
+@pytest.mark.asyncio
+async def test_context_reuses_its_session():
+    server = FakeLlamaStack()
+    executor = _executor(server)
+    
+    assert await executor.call_llamastack("q1", "ctx-a") == "answer from s1"
+    assert await executor.call_llamastack("q2", "ctx-a") == "answer from s1"
+    assert await executor.call_llamastack("q3", "ctx-b") == "answer from s2"
+    assert server.sessions_created == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [404, 410])
+async def test_stale_session_is_replaced_and_turn_retried(status):
+    server = FakeLlamaStack(expired_status=status)
+    executor = _executor(server)
+    await executor.call_llamastack("q1", "ctx-a")
+    
+    server.expired.add("s1")
+    
+    assert await executor.call_llamastack("q2", "ctx-a") == "answer from s2"
+    assert server.turns == ["s1", "s1", "s2"]
+    assert executor._sessions["ctx-a"] == "s2"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [400, 500])
+async def test_other_errors_are_not_retried(status):
+    server = FakeLlamaStack(expired_status=status)
+    executor = _executor(server)
+    await executor.call_llamastack("q1", "ctx-a")
+    
+    server.expired.add("s1")
+    
+    result = await executor.call_llamastack("q2", "ctx-a")
+    assert result == f'LlamaStack HTTP error {status}: {{"detail": "session not found"}}'
+    assert server.turns == ["s1", "s1"]
+    assert server.sessions_created == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_turns_share_one_session():
+    server = FakeLlamaStack()
+    executor = _executor(server)
+    
+    results = await asyncio.gather(*[executor.call_llamastack(f"q{i}", "ctx-a") for i in range(5)])
+    
+    assert results == ["answer from s1"] * 5
+    assert server.sessions_created == 1
@@ -0,0 +1,18 @@
+from starlette.testclient import TestClient
+
+import app.a2a_ops_server as a2a_ops_server
+
+
+def test_shutdown_closes_the_a2a_orchestrator_client(monkeypatch):
+    closed = []
+    
+    async def aclose():
+        closed.append(True)
+    
+    monkeypatch.setattr(a2a_ops_server, "aclose_a2a_http_client", aclose)
+    
+    with TestClient(a2a_ops_server.create_ops_server()) as client:
+        assert client.get("/.well-known/agent.json").status_code == 200
+        assert not closed
+    
+    assert closed == [True]
@@ -0,0 +1,96 @@
+import logging
+
+import pytest
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+
+import app.a2a_orchestrator as a2a_orchestrator
+from app.a2a_orchestrator import SmartOrchestrator
+
+
+def _card(name, port, tags):
+    return AgentCard(
+        name=name,
+        description=f"{name} for tests",
+        url=f"http://localhost:{port}",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        defaultInputModes=["text"],
+        defaultOutputModes=["text"],
+        skills=[AgentSkill(id=f"{name}-skill", name=f"{name} skill", description="test skill", tags=tags)],
+    )
+
+
+@pytest.fixture
+def orchestrator():
+    orchestrator = SmartOrchestrator()
+    for card in (
+        _card("Ops Infrastructure Agent", 8001, ["metrics", "servers"]),
+        _card("Web Search Agent", 8002, ["metrics", "news"]),
+    ):
+        orchestrator.agents[card.name] = card
+    orchestrator._build_tag_index()
+    orchestrator._initialized = True
+    return orchestrator
+
+
+@pytest.fixture(params=[False, True], ids=["fast_path", "langgraph"])
+def use_langgraph(request, monkeypatch):
+    monkeypatch.setattr(a2a_orchestrator, "USE_LANGGRAPH", request.param)
+
+
+@pytest.mark.asyncio
+async def test_tied_agents_fan_out_and_join(orchestrator, use_langgraph):
+    result = await orchestrator.process_request("cpu metrics please")
+    
+    assert result["selected_agent"] == "Ops Infrastructure Agent"
+    assert "tied with Web Search Agent" in result["reasoning"]
+    # One route per tied agent, joined in registration order
+    ops, web = result["response"].split("\n\n")
+    assert ops.startswith("✅ Successfully routed to Ops Infrastructure Agent")
+    assert web.startswith("✅ Successfully routed to Web Search Agent")
+
+
+@pytest.mark.asyncio
+async def test_single_best_agent_takes_one_route(orchestrator, use_langgraph):
+    result = await orchestrator.process_request("latest news")
+    
+    assert result["selected_agent"] == "Web Search Agent"
+    assert "\n\n" not in result["response"]
+
+
+@pytest.mark.asyncio
+async def test_graph_fans_out_with_send(orchestrator):
+    final_state = await orchestrator.workflow.ainvoke(
+        {"request": "cpu metrics please"},
+        config={"configurable": {"orchestrator": orchestrator}},
+    )
+    
+    # Branches finish in any order; join restores the candidate order
+    assert sorted(route["selected_agent"] for route in final_state["routes"]) == [
+        "Ops Infrastructure Agent", "Web Search Agent"
+    ]
+    assert final_state["selected_agent"] == "Ops Infrastructure Agent"
+    assert final_state["agent_url"] == "http://localhost:8001"
+    assert final_state["success"] is True
+
+
+QUERIES = ["show me servers", "cpu metrics please", "latest news", "rca for incident INC1", "hello there", ""]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", QUERIES)
+async def test_fast_path_matches_langgraph_workflow(orchestrator, query):
+    config = {"configurable": {"orchestrator": orchestrator}}
+    graph_state = await orchestrator.workflow.ainvoke({"request": query}, config=config)
+    fast_state = await orchestrator._fast_path({"request": query})
+    
+    assert fast_state == graph_state
+
+
+@pytest.mark.asyncio
+async def test_log_names_the_routing_path(orchestrator, use_langgraph, caplog):
+    with caplog.at_level(logging.INFO, logger=a2a_orchestrator.__name__):
+        await orchestrator.process_request("show me servers")
+    
+    expected = "LangGraph workflow" if a2a_orchestrator.USE_LANGGRAPH else "fast path"
+    assert f"Processing request through {expected}: show me servers" in caplog.messages